@@ -0,0 +1,448 @@
+#!/usr/bin/env python
+# if you don't use Arch Linux then chnage the She-bang to `python3`
+
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+"""
+    ~~~~~~~~~~~
+    analyzer.py
+    ~~~~~~~~~~~
+
+    Static analysis of decision tables as used by `decision_table.py`.
+
+    It reports:
+
+        - shadowed rules, which can never be reached, because earlier
+          rules already match all of their tuples
+        - ambiguous overlaps, where two rules with different actions
+          match the same tuples, so only the order decides
+        - gaps, i.e. tuples for which no rule matches and `evaluate`
+          would raise an exception
+
+    Each rule is treated as a cube in the boolean space of the
+    conditions: a pair of (care-mask, value-mask) as produced by
+    `decision_table.rule_to_masks`. All checks are done by cube algebra
+    (intersection, cofactors and Shannon expansion), so the 2^C 
+    possible tuples are never enumerated and tables with 40 and more
+    conditions can be checked: a random table with 40 conditions and
+    1000 rules takes a few seconds. Proving that rules cover each other
+    is a hard problem in general though, so tables that are just about
+    complete take longest. Only tables with boolean conditions can be
+    analysed.
+
+    As a table with R rules has up to R^2 / 2 overlaps, they are counted
+    and only the first ones are listed, like the gaps.
+
+    Example call:
+    ~~~~~~~~~~~~~
+
+        ./analyzer.py frage_28.json
+
+    .. moduleauthor::  Christian Hausknecht <christian.hausknecht@gmx.de>
+"""
+
+import argparse
+from itertools import islice
+
+from decision_table import load, is_boolean, rule_to_masks
+
+
+def cofactor(cubes, cube):
+    """
+    Restricts `cubes` to the tuples of `cube`: cubes that do not 
+    intersect are dropped, the conditions fixed by `cube` are removed
+    from the others.
+
+    :returns: list of cubes
+    """
+    care, value = cube
+    return [(other_care & ~care, other_value & ~care)
+            for other_care, other_value in cubes
+            if not (value ^ other_value) & care & other_care]
+
+
+try:
+    popcount = int.bit_count
+except AttributeError:
+    # Python < 3.10
+    def popcount(mask):
+        return bin(mask).count("1")
+
+
+def count_literals(cubes, free):
+    """
+    Sums up for each condition the number of tuples of the cubes, which
+    fix it to `True`, and of those, which fix it to `False`, within a
+    space of `free` conditions. Counting tuples instead of cubes lets 
+    the big cubes decide where to split, which finds gaps and proves
+    tautologies in much fewer steps.
+
+    :returns: dict (bit -> count), dict (bit -> count)
+    """
+    positive = {}
+    negative = {}
+    for care, value in cubes:
+        size = 1 << (free - popcount(care))
+        while care:
+            bit = care & -care
+            care ^= bit
+            counts = positive if value & bit else negative
+            counts[bit] = counts.get(bit, 0) + size
+    return positive, negative
+
+
+def weight(cubes, free):
+    """
+    Sums up the number of tuples of all cubes within a space of `free`
+    conditions. If it is smaller than 2^free, the cubes can not cover
+    the whole space.
+
+    :returns: int
+    """
+    return sum(1 << (free - popcount(care)) for care, _ in cubes)
+
+
+def find_gap(cubes, free, tautologies=None):
+    """
+    Searches tuples within a space of `free` conditions, which are not
+    part of the union of `cubes`. The cubes must not fix any other 
+    conditions.
+
+    The search is a Shannon expansion on the most binate condition,
+    which descends into the branch with fewer tuples first, as it most
+    likely contains a gap. Conditions that are fixed to only one value
+    (unate ones) are set to the opposite value without a second branch:
+    the cubes left there are a subset of the others, so if there is a
+    gap at all, there is one as well.
+
+    Different paths of the expansion often lead to the same cofactor.
+    Cofactors found to have no gaps are added to the set `tautologies`,
+    if it is given, and not searched again; it may be shared by all
+    searches within the same table.
+
+    :returns: cube (care-mask, value-mask) or None, if the cubes cover
+              the whole space
+    """
+    if not cubes:
+        return 0, 0
+    positive = negative = 0
+    for care, value in cubes:
+        if not care:
+            return None
+        positive |= value
+        negative |= care ^ value
+    if tautologies is not None:
+        key = (frozenset(cubes), free)
+        if key in tautologies:
+            return None
+    unate = positive ^ negative
+    if unate:
+        # the opposite values drop all cubes, which fix a unate
+        # condition, and the others do not fix any of them
+        gap = find_gap([cube for cube in cubes if not cube[0] & unate],
+                       free - popcount(unate), tautologies)
+        if gap is not None:
+            return gap[0] | unate, gap[1] | unate & negative
+    else:
+        # the split is chosen by the biggest cubes only, the small ones
+        # hardly change the number of tuples of the branches
+        sizes = [popcount(care) for care, _ in cubes]
+        biggest = min(sizes) + 1
+        positive, negative = count_literals(
+            [cube for cube, size in zip(cubes, sizes) if size <= biggest],
+            free)
+        bit = max(set(positive) | set(negative),
+                  key=lambda bit: (min(positive.get(bit, 0),
+                                       negative.get(bit, 0)),
+                                   positive.get(bit, 0) +
+                                   negative.get(bit, 0)))
+        values = [0, bit]
+        # the tuples of the branches differ only by the cubes that fix
+        # `bit`, which go to one side and lose a condition
+        if positive.get(bit, 0) < negative.get(bit, 0):
+            values.reverse()
+        for value in values:
+            gap = find_gap(cofactor(cubes, (bit, value)), free - 1,
+                           tautologies)
+            if gap is not None:
+                return gap[0] | bit, gap[1] | value
+    if tautologies is not None:
+        tautologies.add(key)
+    return None
+
+
+def is_tautology(cubes, free, tautologies=None):
+    """
+    Checks if the union of `cubes` contains all tuples of a space with
+    `free` conditions. The cubes must not fix any other conditions.
+    See `find_gap` for `tautologies`.
+
+    :returns: True or False
+    """
+    return weight(cubes, free) >= 1 << free and \
+           find_gap(cubes, free, tautologies) is None
+
+
+def is_covered(cube, cubes, width):
+    """
+    Checks if the union of `cubes` contains all tuples of `cube`, which
+    is a tautology check of their cofactor.
+
+    :returns: True or False
+    """
+    return is_tautology(cofactor(cubes, cube), width - popcount(cube[0]))
+
+
+def iter_uncovered(cube, cubes, width):
+    """
+    Generates the tuples of `cube` which are not part of any of the
+    `cubes` as disjoint cubes. Each gap found by `find_gap` is cut out
+    of the searched cube, which leaves one cube for every condition the
+    gap fixes, and those are searched next. A single gap is found 
+    quickly even in big tables, so the generator can be stopped at any
+    time.
+
+    :yields: cube (care-mask, value-mask)
+    """
+    tautologies = set()
+    stack = [(cube, cofactor(cubes, cube))]
+    while stack:
+        (care, value), rest = stack.pop()
+        gap = find_gap(rest, width - popcount(care), tautologies)
+        if gap is None:
+            continue
+        gap_care, gap_value = gap
+        # the gap is widened as long as it does not touch any cube, so
+        # fewer and bigger cubes are cut out
+        bits = gap_care
+        while bits:
+            bit = bits & -bits
+            bits ^= bit
+            wider = gap_care ^ bit
+            if not any(not (other_value ^ gap_value) & other_care & wider
+                       for other_care, other_value in rest):
+                gap_care = wider
+                gap_value &= wider
+        yield care | gap_care, value | gap_value
+        while gap_care:
+            bit = gap_care & -gap_care
+            gap_care ^= bit
+            other = ~gap_value & bit
+            stack.append(((care | bit, value | other),
+                          cofactor(rest, (bit, other))))
+            care |= bit
+            value |= gap_value & bit
+            rest = cofactor(rest, (bit, gap_value & bit))
+
+
+def cube_to_rule(cube, width):
+    """
+    Converts a cube back into a rule with `None` for don't cares.
+
+    :returns: list of True, False or None
+    """
+    care, value = cube
+    return [bool(value >> i & 1) if care >> i & 1 else None
+            for i in range(width)]
+
+
+def get_cubes(table):
+    return [rule_to_masks(rule) for rule, _ in table["rules"]]
+
+
+class RuleIndex(object):
+    """
+    Bitsets over the rules of a table, one per condition and value. Bit
+    `r` of `allowed[value][i]` is set, if rule `r` does not fix the 
+    `i`-th condition to the opposite of `value`. The rules intersecting
+    a cube are then found by a few big integer ANDs instead of a scan
+    over all rules.
+    """
+
+    def __init__(self, cubes, width):
+        everything = (1 << len(cubes)) - 1
+        self.allowed = ([everything] * width, [everything] * width)
+        for index, (care, value) in enumerate(cubes):
+            bit = 1 << index
+            for i in range(width):
+                if care >> i & 1:
+                    self.allowed[not value >> i & 1][i] &= ~bit
+        self.everything = everything
+
+    def intersecting(self, cube):
+        """
+        :returns: bitset of the rules which intersect `cube`
+        """
+        care, value = cube
+        result = self.everything
+        i = 0
+        while care:
+            if care & 1:
+                result &= self.allowed[value & 1][i]
+            care >>= 1
+            value >>= 1
+            i += 1
+        return result
+
+
+def iter_bits(bitset):
+    """
+    Generates the positions of all set bits in ascending order.
+
+    :yields: int
+    """
+    while bitset:
+        low = bitset & -bitset
+        yield low.bit_length() - 1
+        bitset ^= low
+
+
+def find_shadowed(table):
+    """
+    Searches rules that are never reached, because the union of all
+    earlier rules covers them.
+
+    :returns: list of (index, indices of the earlier overlapping rules)
+    """
+    cubes = get_cubes(table)
+    width = len(table["conditions"])
+    rule_index = RuleIndex(cubes, width)
+    result = []
+    for index, cube in enumerate(cubes):
+        earlier = list(iter_bits(rule_index.intersecting(cube) & 
+                                 ((1 << index) - 1)))
+        if is_covered(cube, [cubes[i] for i in earlier], width):
+            result.append((index, earlier))
+    return result
+
+
+def get_overlaps(table):
+    """
+    Searches for each rule the later rules with different actions that
+    share at least one tuple with it.
+
+    :returns: list of cubes, list of bitsets of the later rules
+    """
+    cubes = get_cubes(table)
+    rule_index = RuleIndex(cubes, len(table["conditions"]))
+    keys = [tuple(sorted(keys)) for _, keys in table["rules"]]
+    same_actions = {}
+    for index, key in enumerate(keys):
+        same_actions[key] = same_actions.get(key, 0) | 1 << index
+    return cubes, [rule_index.intersecting(cube) & ~same_actions[key] & 
+                   ~((1 << (index + 1)) - 1)
+                   for index, (cube, key) in enumerate(zip(cubes, keys))]
+
+
+def count_overlaps(table):
+    """
+    Counts the pairs of rules of `find_overlaps` without building them,
+    as there are up to R^2 / 2 of them in a table with R rules.
+
+    :returns: int
+    """
+    return sum(popcount(later_rules) for later_rules 
+               in get_overlaps(table)[1])
+
+
+def find_overlaps(table, limit=None):
+    """
+    Searches pairs of rules with different actions that share at least
+    one tuple. The earlier rule always wins. The search stops after 
+    `limit` pairs.
+
+    :returns: list of (index, later index, common cube)
+    """
+    cubes, overlaps = get_overlaps(table)
+    result = []
+    for index, ((care, value), later_rules) in enumerate(zip(cubes,
+                                                             overlaps)):
+        for later in iter_bits(later_rules):
+            if len(result) == limit:
+                return result
+            other_care, other_value = cubes[later]
+            result.append((index, later,
+                           (care | other_care, value | other_value)))
+    return result
+
+
+def find_gaps(table, limit=None):
+    """
+    Searches tuples for which no rule matches. As there might be very
+    many of them, the search stops after `limit` cubes.
+
+    :returns: list of disjoint cubes
+    """
+    return list(islice(iter_uncovered((0, 0), get_cubes(table),
+                                      len(table["conditions"])), limit))
+
+
+def analyze(table, limit=100):
+    """
+    Runs all checks on the given table. At most `limit` overlaps and
+    gaps are reported, the number of all overlaps is counted.
+
+    :returns: dict with the keys "shadowed", "overlaps", "overlap_count"
+              and "gaps"
+    """
+    return {
+        "shadowed": find_shadowed(table),
+        "overlaps": find_overlaps(table, limit),
+        "overlap_count": count_overlaps(table),
+        "gaps": find_gaps(table, limit)
+    }
+
+
+def format_rule(rule):
+    return "".join({True: "T", False: "F", None: "-"}[_] for _ in rule)
+
+
+def print_report(report, table):
+    width = len(table["conditions"])
+    print("Shadowed rules:\n---------------")
+    for index, earlier in report["shadowed"]:
+        print("{}. Rule is never reached (covered by {})".format(index+1,
+              ", ".join(str(i+1) for i in earlier)))
+    print("\nAmbiguous overlaps:\n-------------------")
+    for index, later, cube in report["overlaps"]:
+        print("{}. and {}. Rule overlap in {}".format(index+1, later+1,
+              format_rule(cube_to_rule(cube, width))))
+    if report["overlap_count"] > len(report["overlaps"]):
+        print("... and {} more".format(report["overlap_count"] - 
+                                       len(report["overlaps"])))
+    print("\nGaps:\n-----")
+    for cube in report["gaps"]:
+        print("No rule for {}".format(format_rule(cube_to_rule(cube, width))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analyze a decision-table.')
+    parser.add_argument('table', metavar="FILE",
+                        help='a JSON file of the decision-table')
+    parser.add_argument('--limit', type=int, default=100,
+                        help='maximum number of reported overlaps and '
+                             'gaps')
+    args = parser.parse_args()
+
+    table = load(args.table)
+    if not is_boolean(table):
+        parser.error("only tables with boolean conditions can be analyzed")
+    print_report(analyze(table, args.limit), table)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# if you don't use Arch Linux then chnage the She-bang to `python3`
+
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+"""
+    ~~~~~~~~~~~~
+    benchmark.py
+    ~~~~~~~~~~~~
+
+    Compares the evaluation backends for decision tables on random
+    tables of different sizes and densities of 'don't cares':
+
+        - linear:   `decision_table.evaluate` on the plain dict
+        - bitmask:  `decision_table.CompiledTable`
+        - tree:     `decision_tree.DecisionTree`
+
+    The last rule of each table is a catch-all rule, so every tuple has
+    a result. The times are given in microseconds per lookup.
+
+    Example call:
+    ~~~~~~~~~~~~~
+
+        ./benchmark.py --width 20 --rules 10 100 1000 --dontcare 0 0.5 0.9
+
+    .. moduleauthor::  Christian Hausknecht <christian.hausknecht@gmx.de>
+"""
+
+import random
+import argparse
+import timeit
+
+from decision_table import evaluate, CompiledTable
+from decision_tree import DecisionTree
+
+
+def random_table(width, rules, dontcare):
+    return {
+        "conditions": ["cond_{}".format(i) for i in range(width)],
+        "actions": {},
+        "rules": [[[None if random.random() < dontcare
+                    else random.random() < 0.5 for _ in range(width)],
+                   [str(index)]] for index in range(rules - 1)] +
+                 [[[None] * width, []]]
+    }
+
+
+def measure(func, tuples, repeat=3):
+    def run():
+        for tuple_ in tuples:
+            func(tuple_)
+    return min(timeit.repeat(run, number=1, repeat=repeat)) / len(tuples) \
+           * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark decision-table '
+                                                 'backends.')
+    parser.add_argument('--width', type=int, default=16,
+                        help='number of conditions')
+    parser.add_argument('--rules', type=int, nargs="+",
+                        default=[10, 100, 1000])
+    parser.add_argument('--dontcare', type=float, nargs="+",
+                        default=[0.0, 0.3, 0.6, 0.9],
+                        help='probability of a "don\'t care" per condition')
+    parser.add_argument('--samples', type=int, default=2000)
+    args = parser.parse_args()
+
+    print("{:>6} {:>9} {:>10} {:>10} {:>10} {:>7} {:>6}".format(
+          "rules", "dontcare", "linear", "bitmask", "tree", "nodes",
+          "depth"))
+    for rules in args.rules:
+        for dontcare in args.dontcare:
+            table = random_table(args.width, rules, dontcare)
+            compiled = CompiledTable(table)
+            tree = DecisionTree(table)
+            tuples = [[random.random() < 0.5 for _ in range(args.width)]
+                      for _ in range(args.samples)]
+            for tuple_ in tuples:
+                assert tree.evaluate(tuple_) == evaluate(tuple_, table)
+            print("{:>6} {:>9} {:>10.2f} {:>10.2f} {:>10.2f} {:>7} {:>6}"
+                  .format(rules, dontcare,
+                          measure(lambda t: evaluate(t, table), tuples),
+                          measure(compiled.evaluate, tuples),
+                          measure(tree.evaluate, tuples),
+                          len(tree.nodes), tree.depth()))
+
+
+if __name__ == '__main__':
+    main()
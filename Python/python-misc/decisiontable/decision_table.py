@@ -44,6 +44,18 @@
     rule entries must match the number of conditions. The number of 
     actions is arbitrary but at least an empty list.
     
+    Besides booleans a rule entry may also be:
+    
+        - a single value (string or number), which must be matched 
+          exactly, e.g. "gold"
+        - a list of values, one of which must be matched, e.g. 
+          ["gold", "silver"]
+        - a dict with "min" and/or "max" for a numeric range including
+          its bounds, e.g. {"min": 18, "max": 65}
+    
+    Tables with such entries are evaluated by an `IndexedTable`; see
+    `frage_28_werte.json` for an example.
+    
     As this structure can be easily transformed into JSON, the module
     provides a `load`-function for that purpose. You should in general
     use a JSON-file for providing a decision-table and not build it
@@ -51,6 +63,32 @@
     
     Hint: A `None` is translated into `null` in JSON!
     
+    If a table has to be evaluated very often, compile it once into a
+    `CompiledTable`. Each rule is then stored as a pair of bitmasks and
+    a lookup needs only a few dict accesses instead of a scan over all
+    rules:
+    
+        compiled = CompiledTable(load("wiki_en_example.json"))
+        index, action_keys = compiled.evaluate([True, False, True])
+    
+    Many tuples at once can be evaluated with `evaluate_many`, which 
+    takes a NxC boolean matrix and needs NumPy. It returns the index of
+    the matching rule for each row or -1 if no rule matches.
+    
+    For scoring huge amounts of tuples from the command line use the
+    streaming mode, which loads the table only once and reads one rule
+    per line:
+    
+        ./decision_table.py wiki_en_example.json --stream < rules.txt
+    
+    Long running programs should use `load_compiled`, which keeps the
+    compiled tables in a process wide cache and stores them as pickle
+    file next to the JSON file, so even a new process does not need to
+    parse the JSON again:
+    
+        index, action_keys = load_compiled("wiki_en_example.json")\
+                                .evaluate([True, False, True])
+    
     An example JSON-file could look like this. It shows the example
     from the english wikipedia entry:
     
@@ -106,11 +144,20 @@
     .. moduleauthor::  Christian Hausknecht <christian.hausknecht@gmx.de>
 """
 
+import os
 import sys
 import json
+import pickle
+import hashlib
 import argparse
-from operator import eq
-from itertools import starmap
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 def get_valid_indices(rule):
@@ -130,6 +177,25 @@ def get_valid_indices(rule):
             yield i
 
 
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def matches(value, expected):
+    """
+    Checks a single value against an entry of a rule, which might be a 
+    boolean, a single value, a list of values or a range.
+    
+    :returns: True or False
+    """
+    if isinstance(expected, list):
+        return value in expected
+    if isinstance(expected, dict):
+        return is_number(value) and expected.get("min", value) <= value \
+               <= expected.get("max", value)
+    return value == expected
+
+
 def is_equal(tuple_, rule):
     """
     Checks pairwise values of the given tuple and rule for equality.
@@ -137,9 +203,235 @@ def is_equal(tuple_, rule):
     
     :returns: True or False
     """
-    return all(starmap(eq, (pair for index, pair 
-                                 in enumerate(zip(tuple_, rule)) 
-                                 if index in get_valid_indices(rule))))
+    return all(matches(value, expected) for value, expected 
+               in zip(tuple_, rule) if expected is not None)
+
+
+def is_boolean(table):
+    """
+    Checks if the table only uses boolean conditions and 'don't cares'.
+    
+    :returns: True or False
+    """
+    return all(isinstance(item, bool) or item is None 
+               for rule, _ in table["rules"] for item in rule)
+
+
+def rule_to_masks(rule):
+    """
+    Converts a rule into a pair of bitmasks. Bit `i` of the care-mask is
+    set, if the `i`-th condition is well defined; bit `i` of the 
+    value-mask is set, if that condition must be `True`.
+    
+    Example:
+
+        (True, False, None) would result in (0b011, 0b001)
+        (None, True, True) would result in (0b110, 0b110)
+    
+    :returns: care-mask (int), value-mask (int)
+    """
+    care = value = 0
+    for i, item in enumerate(rule):
+        if item is not None:
+            if not isinstance(item, bool):
+                raise Exception("{} is not a boolean condition!".format(
+                                item))
+            care |= 1 << i
+            if item:
+                value |= 1 << i
+    return care, value
+
+
+def tuple_to_mask(tuple_):
+    """
+    Converts a tuple of boolean values into a value-mask.
+    
+    :returns: int
+    """
+    mask = 0
+    for i, item in enumerate(tuple_):
+        if item:
+            mask |= 1 << i
+    return mask
+
+
+class CompiledTable(object):
+    """
+    A decision table prepared for fast evaluation.
+    
+    Fully specified rules are kept in a dict that maps a value-mask
+    directly onto the index of the first rule with that mask. All other
+    rules are grouped by their care-mask, so a tuple can be checked 
+    against a whole group by a single dict access of `mask & care`.
+    The groups are sorted by the smallest rule index they contain, so 
+    the search stops as soon as no remaining group could hold an earlier
+    rule. That keeps the 'first match wins'-semantics of `evaluate`.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.rules = table["rules"]
+        self.width = len(table["conditions"])
+        self.full = (1 << self.width) - 1
+        self.masks = [rule_to_masks(rule) for rule, _ in self.rules]
+        self.exact = {}
+        groups = {}
+        for index, (care, value) in enumerate(self.masks):
+            if care == self.full:
+                self.exact.setdefault(value, index)
+            else:
+                groups.setdefault(care, {}).setdefault(value, index)
+        self.groups = sorted(((min(lookup.values()), care, lookup) 
+                              for care, lookup in groups.items()),
+                             key=lambda group: group[0])
+
+    def find(self, mask):
+        """
+        Searches the index of the first rule that matches the given 
+        value-mask.
+        
+        :returns: index of the ruleset (int) or None
+        """
+        best = self.exact.get(mask)
+        for first, care, lookup in self.groups:
+            if best is not None and first > best:
+                break
+            index = lookup.get(mask & care)
+            if index is not None and (best is None or index < best):
+                best = index
+        return best
+
+    def evaluate(self, tuple_):
+        """
+        Searches the corresponding rule from the ruleset to the given 
+        one. Raises an exception if no rule is found.
+        
+        :returns: index of the ruleset (int), list of action keys
+        """
+        if len(tuple_) != self.width:
+            raise Exception("{} does not match {} conditions!".format(
+                            tuple_, self.width))
+        index = self.find(tuple_to_mask(tuple_))
+        if index is None:
+            raise Exception("No approriate rule found for {}!".format(
+                            tuple_))
+        return index, self.rules[index][1]
+
+
+class IndexedTable(object):
+    """
+    A decision table with arbitrary conditions prepared for fast 
+    evaluation.
+    
+    The rules are represented as bits of integers ('bitsets'); bit `r`
+    stands for rule `r`. For each condition there are bitsets of the 
+    rules, which accept a given value:
+    
+        - `values[i]` maps single values and members of lists onto the
+          rules that name them
+        - `points[i]` is the sorted array of all range boundaries and
+          `segments[i]` holds a bitset for every boundary and every gap
+          between two boundaries, so a value is mapped onto the matching
+          ranges by one `bisect`
+        - `wildcards[i]` contains all rules that don't care
+    
+    The candidates of a tuple are the intersection of the bitsets of 
+    all its values; the lowest bit is the first matching rule.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.rules = table["rules"]
+        self.width = len(table["conditions"])
+        self.values = [{} for _ in range(self.width)]
+        self.points = []
+        self.segments = []
+        self.wildcards = [0] * self.width
+        for i in range(self.width):
+            ranges = []
+            for index, (rule, _) in enumerate(self.rules):
+                bit = 1 << index
+                item = rule[i]
+                if item is None:
+                    self.wildcards[i] |= bit
+                elif isinstance(item, dict):
+                    ranges.append((item, bit))
+                else:
+                    for value in item if isinstance(item, list) else [item]:
+                        self.values[i][value] = \
+                            self.values[i].get(value, 0) | bit
+            self.index_ranges(ranges)
+
+    def index_ranges(self, ranges):
+        points = sorted(set(bound for item, _ in ranges 
+                            for bound in (item.get("min"), item.get("max"))
+                            if bound is not None))
+        # slot 2*k+1 is exactly points[k], slot 2*k is the gap before it
+        segments = [0] * (2 * len(points) + 1)
+        for item, bit in ranges:
+            low = 2 * bisect_left(points, item["min"]) + 1 \
+                  if "min" in item else 0
+            high = 2 * bisect_left(points, item["max"]) + 1 \
+                   if "max" in item else len(segments) - 1
+            for slot in range(low, high + 1):
+                segments[slot] |= bit
+        self.points.append(points)
+        self.segments.append(segments)
+
+    def candidates(self, i, value):
+        """
+        :returns: bitset of the rules which accept `value` for the 
+                  `i`-th condition
+        """
+        result = self.values[i].get(value, 0) | self.wildcards[i]
+        points = self.points[i]
+        if is_number(value):
+            slot = bisect_left(points, value)
+            if slot < len(points) and points[slot] == value:
+                result |= self.segments[i][2 * slot + 1]
+            else:
+                result |= self.segments[i][2 * slot]
+        return result
+
+    def find(self, tuple_):
+        """
+        Searches the index of the first rule that matches the given 
+        tuple.
+        
+        :returns: index of the ruleset (int) or None
+        """
+        result = (1 << len(self.rules)) - 1
+        for i, value in enumerate(tuple_):
+            result &= self.candidates(i, value)
+            if not result:
+                return None
+        return (result & -result).bit_length() - 1
+
+    def evaluate(self, tuple_):
+        """
+        Searches the corresponding rule from the ruleset to the given 
+        one. Raises an exception if no rule is found.
+        
+        :returns: index of the ruleset (int), list of action keys
+        """
+        if len(tuple_) != self.width:
+            raise Exception("{} does not match {} conditions!".format(
+                            tuple_, self.width))
+        index = self.find(tuple_)
+        if index is None:
+            raise Exception("No approriate rule found for {}!".format(
+                            tuple_))
+        return index, self.rules[index][1]
+
+
+def compile_table(table):
+    """
+    Compiles a table into a `CompiledTable` if it only has boolean 
+    conditions, else into an `IndexedTable`.
+    
+    :returns: CompiledTable or IndexedTable
+    """
+    return CompiledTable(table) if is_boolean(table) else IndexedTable(table)
 
 
 def evaluate(tuple_, table):
@@ -147,8 +439,13 @@ def evaluate(tuple_, table):
     Searches the corresponding rule from the ruleset to the given one.
     Raises an exception if no rule is found.
     
+    `table` may also be a `CompiledTable` or an `IndexedTable`, which are
+    much faster for big tables.
+    
     :returns: index of the ruleset (int), list of action keys
     """
+    if isinstance(table, (CompiledTable, IndexedTable)):
+        return table.evaluate(tuple_)
     rules = table["rules"]
     for index, item in enumerate(rules):
         rule, action_keys = item
@@ -157,6 +454,163 @@ def evaluate(tuple_, table):
     raise Exception("No approriate rule found for {}!".format(tuple_))
 
 
+def evaluate_many(matrix, table):
+    """
+    Evaluates all rows of a NxC boolean matrix in one pass. Each row
+    is packed into an integer key, which is then searched in the 
+    rule groups of the compiled table with `numpy.searchsorted`; so
+    there is no Python loop over the rows, only over the groups.
+    
+    `table` may be a dict or a `CompiledTable`; it must only have
+    boolean conditions.
+    
+    :returns: numpy array with the index of the first matching rule
+              for each row or -1, if no rule matches.
+    """
+    if numpy is None:
+        raise Exception("evaluate_many needs NumPy!")
+    if isinstance(table, IndexedTable) or \
+            not isinstance(table, CompiledTable) and not is_boolean(table):
+        raise Exception("evaluate_many needs a table with boolean "
+                        "conditions only!")
+    if not isinstance(table, CompiledTable):
+        table = CompiledTable(table)
+    matrix = numpy.asarray(matrix, dtype=bool)
+    if matrix.ndim == 2 and not len(matrix):
+        # e.g. an empty batch file, whose width is unknown
+        return numpy.zeros(0, dtype=numpy.int64)
+    if matrix.ndim != 2 or matrix.shape[1] != table.width:
+        raise Exception("Matrix of shape {} does not match {} "
+                        "conditions!".format(matrix.shape, table.width))
+    if table.width > 63:
+        raise Exception("evaluate_many supports at most 63 conditions!")
+    weights = numpy.left_shift(1, numpy.arange(table.width, dtype=numpy.int64))
+    keys = matrix.astype(numpy.int64).dot(weights)
+    result = numpy.full(len(keys), -1, dtype=numpy.int64)
+    groups = [(table.full, table.exact)] + \
+             [(care, lookup) for _, care, lookup in table.groups]
+    for care, lookup in groups:
+        if not lookup:
+            continue
+        values = numpy.fromiter(sorted(lookup), dtype=numpy.int64, 
+                                count=len(lookup))
+        indices = numpy.array([lookup[value] for value in values],
+                              dtype=numpy.int64)
+        masked = keys & care
+        positions = numpy.searchsorted(values, masked)
+        positions[positions == len(values)] = 0
+        found = values[positions] == masked
+        candidates = numpy.where(found, indices[positions], -1)
+        better = found & ((result == -1) | (candidates < result))
+        result[better] = candidates[better]
+    return result
+
+
+def load_batch(filename, width=None):
+    """
+    Reads a file with one rule per line in the format of 
+    `str_to_booleans`, e.g. "TTF", into a NxC boolean matrix. Row `i`
+    belongs to line `i`; a blank line or a line that is not a rule of
+    `width` conditions is marked as invalid and its row is all `False`.
+    Without `width` the length of the first rule is taken.
+    
+    :returns: numpy array (matrix), numpy array with a boolean for each
+              line, which is `True` for valid lines
+    """
+    if numpy is None:
+        raise Exception("load_batch needs NumPy!")
+    with open(filename, "rb") as infile:
+        lines = [line.strip().upper() for line in infile]
+    if width is None:
+        width = next((len(line) for line in lines if line), 0)
+    valid = numpy.array([len(line) == width and 
+                         not line.replace(b"T", b"").replace(b"F", b"")
+                         for line in lines], dtype=bool)
+    blank = b"F" * width
+    chars = numpy.frombuffer(b"".join(line if ok else blank for line, ok
+                                      in zip(lines, valid.tolist())),
+                             dtype="S1")
+    return (chars == b"T").reshape(len(lines), width), valid
+
+
+def evaluate_batch(filename, table):
+    """
+    Evaluates a file of `load_batch` with `evaluate_many`.
+    
+    :returns: numpy array with the index of the first matching rule
+              for each line or -1, if the line is blank or malformed or
+              no rule matches.
+    """
+    if not isinstance(table, (CompiledTable, IndexedTable)):
+        table = compile_table(table)
+    matrix, valid = load_batch(filename, table.width)
+    result = evaluate_many(matrix, table)
+    result[~valid] = -1
+    return result
+
+
+def find_line(line, table):
+    """
+    Searches the first rule matching a rule given as string like on the
+    command line.
+    
+    :returns: index of the ruleset (int) or None, if the line is
+              malformed or no rule matches
+    """
+    if isinstance(table, IndexedTable):
+        tuple_ = str_to_values(line) if line else []
+        return table.find(tuple_) if len(tuple_) == table.width else None
+    if len(line) != table.width:
+        return None
+    try:
+        return table.find(tuple_to_mask(str_to_booleans(line)))
+    except KeyError:
+        return None
+
+
+def evaluate_stream(infile, outfile, table, chunk_size=65536,
+                    cache_size=1 << 20):
+    """
+    Evaluates one rule per line of `infile` and writes a line of the
+    form `index<TAB>action_keys` for each of them into `outfile`, so
+    output line N belongs to input line N. The keys are separated by
+    commas; a malformed or blank line or a missing rule results in an
+    index of -1. Results are cached per distinct input line and written
+    in chunks of `chunk_size` lines.
+    
+    `table` may be a dict, a `CompiledTable` or an `IndexedTable`. The
+    lines hold rules as on the command line: "TTF" for a boolean table,
+    a comma separated list like "CH,42,F" for other tables.
+    
+    :returns: number of evaluated lines (int)
+    """
+    if not isinstance(table, (CompiledTable, IndexedTable)):
+        table = compile_table(table)
+    cache = {}
+    chunk = []
+    count = 0
+    for line in infile:
+        line = line.strip()
+        result = cache.get(line)
+        if result is None:
+            index = find_line(line, table)
+            if index is None:
+                result = "-1\t\n"
+            else:
+                result = "{}\t{}\n".format(index, 
+                                            ",".join(table.rules[index][1]))
+            if len(cache) >= cache_size:
+                cache.clear()
+            cache[line] = result
+        chunk.append(result)
+        if len(chunk) >= chunk_size:
+            outfile.write("".join(chunk))
+            count += len(chunk)
+            del chunk[:]
+    outfile.write("".join(chunk))
+    return count + len(chunk)
+
+
 def print_result(index, action_keys, table):
     rules, actions, conditions = map(table.get, ("rules", "actions",
                                                 "conditions"))
@@ -175,23 +629,219 @@ def load(filename):
         return json.load(infile)
 
 
+class TableCache(object):
+    """
+    A LRU cache of compiled tables. An entry is valid as long as path, 
+    modification time and size of the JSON file did not change; with
+    `use_hash` the SHA1 of the content must match as well.
+    
+    On a miss the cache first tries a pickle file next to the JSON file
+    (the same name with an additional ".pickle"), which holds the 
+    compiled table together with the signature of the JSON file it was
+    built from. Only if that is missing or outdated, the JSON file is
+    parsed and compiled; the result is then written back as pickle.
+    Pickle files of another `PICKLE_VERSION` are ignored as well, so
+    increase it whenever the layout of `CompiledTable` or `IndexedTable`
+    changes.
+    
+    Note: pickle files are trusted like the JSON files themselves! 
+    """
+
+    PICKLE_FORMAT = "decision_table"
+    PICKLE_VERSION = 1
+
+    def __init__(self, maxsize=128, use_hash=False, use_pickle=True):
+        self.maxsize = maxsize
+        self.use_hash = use_hash
+        self.use_pickle = use_pickle
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = self.disk_hits = 0
+
+    def signature(self, filename):
+        stat = os.stat(filename)
+        digest = None
+        if self.use_hash:
+            with open(filename, "rb") as infile:
+                digest = hashlib.sha1(infile.read()).hexdigest()
+        return stat.st_mtime, stat.st_size, digest
+
+    def load_pickle(self, filename, signature):
+        try:
+            with open(filename + ".pickle", "rb") as infile:
+                format_, version, stored, table = pickle.load(infile)
+        except (IOError, OSError, EOFError, AttributeError, ImportError,
+                TypeError, ValueError, pickle.UnpicklingError):
+            return None
+        if (format_, version) != (self.PICKLE_FORMAT, self.PICKLE_VERSION):
+            return None
+        return table if stored == signature else None
+
+    def dump_pickle(self, filename, signature, table):
+        tmpname = "{}.pickle.{}".format(filename, os.getpid())
+        try:
+            with open(tmpname, "wb") as outfile:
+                pickle.dump((self.PICKLE_FORMAT, self.PICKLE_VERSION,
+                             signature, table), outfile,
+                            pickle.HIGHEST_PROTOCOL)
+            os.rename(tmpname, filename + ".pickle")
+        except (IOError, OSError, pickle.PicklingError):
+            try:
+                os.remove(tmpname)
+            except OSError:
+                pass
+
+    def get(self, filename):
+        """
+        Returns the compiled table of the given JSON file.
+        
+        :returns: CompiledTable or IndexedTable
+        """
+        path = os.path.abspath(filename)
+        signature = self.signature(path)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        table = self.load_pickle(path, signature) if self.use_pickle \
+                else None
+        if table is not None:
+            with self.lock:
+                self.disk_hits += 1
+        else:
+            table = compile_table(load(path))
+            if self.use_pickle:
+                self.dump_pickle(path, signature, table)
+        with self.lock:
+            self.entries[path] = (signature, table)
+            self.entries.move_to_end(path)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return table
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """
+        :returns: dict with the counters "hits", "misses", "disk_hits" 
+                  and the current "size" of the cache
+        """
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "disk_hits": self.disk_hits, "size": len(self.entries)}
+
+
+cache = TableCache()
+
+
+def load_compiled(filename):
+    """
+    Loads and compiles a table through the process wide `cache`.
+    
+    :returns: CompiledTable or IndexedTable
+    """
+    return cache.get(filename)
+
+
 def str_to_booleans(value):
     return [{"T": True, "F": False}[_] for _ in value.upper()]
 
 
+def str_to_values(value):
+    """
+    Converts a comma separated list of values into a tuple. "T" and "F"
+    become booleans, numbers become `int` or `float` and everything else
+    stays a string.
+    
+    Example:
+    
+        "T,42,gold" would result in [True, 42, "gold"]
+    
+    :returns: list
+    """
+    result = []
+    for item in value.split(","):
+        item = item.strip()
+        if item.upper() in ("T", "F"):
+            result.append(item.upper() == "T")
+            continue
+        for type_ in (int, float):
+            try:
+                result.append(type_(item))
+                break
+            except ValueError:
+                pass
+        else:
+            result.append(item)
+    return result
+
+
 def main():
     parser = argparse.ArgumentParser(description='Evaluate a decision-table.')
     parser.add_argument('table', metavar="FILE", 
                         help='a JSON file of the decision-table')
-    parser.add_argument('rule', metavar="RULE", help='a given rule as String. '
+    parser.add_argument('rule', metavar="RULE", nargs="?",
+                        help='a given rule as String. '
                                 'Use "T" for "True" and "F" for "False". '
-                                'For example "TTF" for True, True, False.')
+                                'For example "TTF" for True, True, False. '
+                                'Tables with other values need a comma '
+                                'separated list like "CH,42,F".')
+    parser.add_argument('--batch', metavar="FILE",
+                        help='a file with one rule per line; prints the '
+                             'index of the matching rule for each line '
+                             '(-1 if no rule matches or the line is '
+                             'blank or malformed).')
+    parser.add_argument('--stream', metavar="FILE", nargs="?", const="-",
+                        type=argparse.FileType("r"),
+                        help='read one rule per line from FILE or stdin and '
+                             'print "index<TAB>action_keys" for each line.')
+    parser.add_argument('--minimize', action="store_true",
+                        help='print an equivalent table with as few rules '
+                             'as possible as JSON and report the savings.')
     args = parser.parse_args()
     
-    table = load(args.table)
-    tuple_ = str_to_booleans(args.rule)
-    index, action_keys = evaluate(tuple_, table)
-    print_result(index, action_keys, table)
+    if args.stream and args.batch:
+        parser.error("--stream and --batch can not be combined")
+    plain = load(args.table)
+    if (args.minimize or args.batch) and not is_boolean(plain):
+        parser.error("--{} needs a table with boolean conditions "
+                     "only".format("minimize" if args.minimize else "batch"))
+    if args.minimize:
+        # imported here, as the minimizer itself builds on this module
+        from minimizer import minimize, compare, print_report
+        minimized = minimize(plain)
+        json.dump(minimized, sys.stdout, indent=4)
+        sys.stdout.write("\n")
+        print_report(compare(plain, minimized))
+        return
+    
+    table = compile_table(plain)
+    if args.stream:
+        try:
+            evaluate_stream(args.stream, sys.stdout, table)
+        finally:
+            if args.stream is not sys.stdin:
+                args.stream.close()
+        return
+    if args.batch:
+        result = evaluate_batch(args.batch, table)
+        sys.stdout.write("".join("{}\n".format(index)
+                                 for index in result.tolist()))
+        return
+    if args.rule is None:
+        parser.error("either RULE, --batch, --stream or --minimize is "
+                     "required")
+    if "," in args.rule or isinstance(table, IndexedTable):
+        tuple_ = str_to_values(args.rule)
+    else:
+        tuple_ = str_to_booleans(args.rule)
+    index, action_keys = table.evaluate(tuple_)
+    print_result(index, action_keys, table.table)
 
 
 if __name__ == '__main__':
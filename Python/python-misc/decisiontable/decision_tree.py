@@ -0,0 +1,182 @@
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+"""
+    ~~~~~~~~~~~~~~~~
+    decision_tree.py
+    ~~~~~~~~~~~~~~~~
+
+    Compiles the rules of a decision table into a binary decision
+    diagram, so `evaluate` only has to test the conditions on one path
+    from the root to a leaf instead of comparing the tuple to every rule.
+    That pays off especially for tables with many 'don't cares', where
+    the hash lookup of `decision_table.CompiledTable` has to check many
+    groups of rules.
+
+    Each node holds the rules that might still match, in their original
+    order. The node splits on one of the conditions of its first rule,
+    so after at most C tests the first rule either does not match any
+    more or has no conditions left and wins - exactly the 'first match
+    wins'-semantics of `decision_table.evaluate`. Among the conditions of
+    the first rule the one with the highest information gain over the
+    remaining rules is chosen. Identical sub trees are shared. Only 
+    boolean conditions are supported.
+
+    Example:
+
+        tree = DecisionTree(load("frage_28.json"))
+        index, action_keys = tree.evaluate([True, False, True])
+
+    .. moduleauthor::  Christian Hausknecht <christian.hausknecht@gmx.de>
+"""
+
+from math import log
+
+from decision_table import rule_to_masks
+
+
+NO_RULE = -1
+
+
+def entropy(weights):
+    total = float(sum(weights))
+    return -sum(w / total * log(w / total, 2) for w in weights if w)
+
+
+def information_gain(candidates, bit):
+    """
+    Estimates the information gain of splitting the candidates on the
+    condition `bit`. Every rule is weighted by the number of tuples it
+    matches; a rule that does not care about the condition goes with
+    half of its weight into both branches.
+
+    :returns: float
+    """
+    weights = [1.0 / (1 << bin(care).count("1")) for _, care, _ in candidates]
+    branches = ([], [])
+    for w, (_, care, value) in zip(weights, candidates):
+        if not care & bit:
+            branches[0].append(w / 2)
+            branches[1].append(w / 2)
+        else:
+            branches[bool(value & bit)].append(w)
+    total = sum(weights)
+    return entropy(weights) - sum(sum(branch) / total * entropy(branch)
+                                  for branch in branches if branch)
+
+
+class DecisionTree(object):
+    """
+    A decision table compiled into a binary decision diagram.
+
+    The nodes are stored in the list `nodes` as triples of (index of
+    the condition, node for `False`, node for `True`). A reference to a
+    node is its position in `nodes`; leaves are encoded as negative
+    numbers: `-(index + 2)` for the rule `index` and `NO_RULE` if no rule
+    matches.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.rules = table["rules"]
+        self.width = len(table["conditions"])
+        self.nodes = []
+        self.memo = {}
+        candidates = tuple((index, care, value) for index, (care, value)
+                           in enumerate(rule_to_masks(rule)
+                                        for rule, _ in self.rules))
+        self.root = self.build(candidates)
+        del self.memo
+
+    def build(self, candidates):
+        if not candidates:
+            return NO_RULE
+        first, care, _ = candidates[0]
+        if not care:
+            return -(first + 2)
+        node = self.memo.get(candidates)
+        if node is not None:
+            return node
+        bits = []
+        while care:
+            bits.append(care & -care)
+            care ^= bits[-1]
+        bit = max(bits, key=lambda bit: information_gain(candidates, bit))
+        low = self.build(self.cofactor(candidates, bit, 0))
+        high = self.build(self.cofactor(candidates, bit, bit))
+        if low == high:
+            node = low
+        else:
+            node = len(self.nodes)
+            self.nodes.append((bit.bit_length() - 1, low, high))
+        self.memo[candidates] = node
+        return node
+
+    @staticmethod
+    def cofactor(candidates, bit, value):
+        """
+        Keeps the candidates, which match if the condition `bit` has the
+        given value, and removes that condition from them. Everything
+        behind a rule without conditions is unreachable and dropped.
+        """
+        result = []
+        for index, care, rule_value in candidates:
+            if care & bit and (rule_value & bit) != value:
+                continue
+            result.append((index, care & ~bit, rule_value & ~bit))
+            if not care & ~bit:
+                break
+        return tuple(result)
+
+    def depth(self, node=None):
+        """
+        :returns: the maximum number of conditions tested for a tuple
+        """
+        node = self.root if node is None else node
+        if node < 0:
+            return 0
+        _, low, high = self.nodes[node]
+        return 1 + max(self.depth(low), self.depth(high))
+
+    def find(self, tuple_):
+        """
+        Searches the index of the first rule that matches the given
+        tuple.
+
+        :returns: index of the ruleset (int) or None
+        """
+        nodes = self.nodes
+        node = self.root
+        while node >= 0:
+            condition, low, high = nodes[node]
+            node = high if tuple_[condition] else low
+        return None if node == NO_RULE else -node - 2
+
+    def evaluate(self, tuple_):
+        """
+        Searches the corresponding rule from the ruleset to the given
+        one. Raises an exception if no rule is found.
+
+        :returns: index of the ruleset (int), list of action keys
+        """
+        if len(tuple_) != self.width:
+            raise Exception("{} does not match {} conditions!".format(
+                            tuple_, self.width))
+        index = self.find(tuple_)
+        if index is None:
+            raise Exception("No approriate rule found for {}!".format(
+                            tuple_))
+        return index, self.rules[index][1]
@@ -0,0 +1,187 @@
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+"""
+    ~~~~~~~~~~~~
+    minimizer.py
+    ~~~~~~~~~~~~
+
+    Rewrites the rules of a decision table into a smaller, equivalent set
+    of rules with 'don't care'-conditions. Equivalent means, that every
+    tuple results in the same list of actions as before and that tuples
+    without a rule still have none. Only the indices of the rules change.
+
+    The algorithm is a simplified Espresso heuristic, working on the
+    cubes of `analyzer.py`:
+
+        1. All rules with identical action lists form a class. The tuples
+           each rule really matches (its cube minus all earlier rules) are
+           the ON-set of its class.
+        2. The classes are written in order of increasing size. Tuples of
+           earlier classes are caught by their rules, so later classes
+           may cover them as well ('don't cares'). Tuples of later classes
+           and tuples without any rule must never be covered (OFF-set).
+        3. Each cube of a class is expanded by dropping conditions as long
+           as it does not touch the OFF-set.
+        4. Cubes which are covered by the other cubes of their class and
+           the 'don't cares' are removed.
+
+    So the biggest class comes last and often ends up as a single rule
+    with lots of `None`s.
+
+    From the command line the minimizer is called via `decision_table.py`:
+
+        ./decision_table.py wiki_beispiel.json --minimize > minimized.json
+
+    .. moduleauthor::  Christian Hausknecht <christian.hausknecht@gmx.de>
+"""
+
+import sys
+import random
+import timeit
+
+from decision_table import evaluate
+from analyzer import RuleIndex, cube_to_rule, get_cubes, is_covered, \
+                     iter_uncovered, popcount
+
+
+def get_classes(table):
+    """
+    Splits the tuples of the table into classes of identical action
+    lists.
+
+    :returns: list of (action keys, list of disjoint cubes), ordered by
+              the first rule of each class
+    """
+    cubes = get_cubes(table)
+    width = len(table["conditions"])
+    classes = {}
+    order = []
+    for index, (cube, (_, action_keys)) in enumerate(zip(cubes,
+                                                         table["rules"])):
+        key = tuple(action_keys)
+        if key not in classes:
+            classes[key] = []
+            order.append(key)
+        classes[key].extend(iter_uncovered(cube, cubes[:index], width))
+    return [(list(key), classes[key]) for key in order]
+
+
+def expand(cube, off_index):
+    """
+    Drops as many conditions of `cube` as possible without intersecting
+    any cube of the OFF-set.
+
+    :returns: cube
+    """
+    care, value = cube
+    remaining = care
+    while remaining:
+        bit = remaining & -remaining
+        remaining ^= bit
+        candidate = (care & ~bit, value & ~bit)
+        if not off_index.intersecting(candidate):
+            care, value = candidate
+    return care, value
+
+
+def minimize_class(on_set, dc_set, off_set, width):
+    """
+    Computes a small cover of `on_set`, which may overlap `dc_set` but
+    must not intersect `off_set`.
+
+    :returns: list of cubes
+    """
+    off_index = RuleIndex(off_set, width)
+    cover = []
+    for cube in sorted(on_set, key=lambda cube: popcount(cube[0])):
+        if any(not (care & ~cube[0]) and not (value ^ cube[1]) & care
+               for care, value in cover):
+            continue
+        cover.append(expand(cube, off_index))
+    cover.sort(key=lambda cube: popcount(cube[0]), reverse=True)
+    result = list(cover)
+    for cube in cover:
+        rest = [other for other in result if other is not cube]
+        if is_covered(cube, rest + dc_set, width):
+            result = rest
+    return result
+
+
+def minimize(table):
+    """
+    Computes an equivalent table with as few rules as possible.
+
+    :returns: dict (table)
+    """
+    width = len(table["conditions"])
+    classes = get_classes(table)
+    classes.sort(key=lambda item: sum(1 << (width - popcount(care))
+                                      for care, _ in item[1]))
+    gaps = list(iter_uncovered((0, 0), get_cubes(table), width))
+    rules = []
+    for position, (action_keys, on_set) in enumerate(classes):
+        dc_set = [cube for _, cubes in classes[:position] for cube in cubes]
+        off_set = [cube for _, cubes in classes[position+1:]
+                   for cube in cubes] + gaps
+        for cube in minimize_class(on_set, dc_set, off_set, width):
+            rules.append([cube_to_rule(cube, width), action_keys])
+    return {
+        "conditions": table["conditions"],
+        "actions": table["actions"],
+        "rules": rules
+    }
+
+
+def measure(table, tuples, number=3):
+    """
+    Measures the time a linear `evaluate` needs for all given tuples.
+
+    :returns: seconds (float)
+    """
+    def run():
+        for tuple_ in tuples:
+            try:
+                evaluate(tuple_, table)
+            except Exception:
+                pass
+    return min(timeit.repeat(run, number=1, repeat=number))
+
+
+def compare(table, minimized, samples=10000):
+    """
+    Compares the original and the minimized table by the number of rules
+    and the time for evaluating random tuples.
+
+    :returns: dict with "rules" and "seconds" as (before, after) each
+    """
+    width = len(table["conditions"])
+    tuples = [[random.random() < 0.5 for _ in range(width)]
+              for _ in range(samples)]
+    return {
+        "rules": (len(table["rules"]), len(minimized["rules"])),
+        "seconds": (measure(table, tuples), measure(minimized, tuples))
+    }
+
+
+def print_report(report, outfile=sys.stderr):
+    before, after = report["rules"]
+    outfile.write("Rules: {} -> {} ({:.1%} less)\n".format(before, after,
+                  1 - after / float(before) if before else 0))
+    before, after = report["seconds"]
+    outfile.write("Lookup time: {:.4f}s -> {:.4f}s ({:.2f}x)\n".format(
+                  before, after, before / after if after else 0))
+
@@ -0,0 +1,389 @@
+# coding: utf-8
+
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+"""
+    ~~~~~~~~~~~~~~~~~~~~~~
+    test_decision_table.py
+    ~~~~~~~~~~~~~~~~~~~~~~
+
+    Tests for `decision_table.py`; run them with
+
+        python -m unittest test_decision_table
+
+    .. moduleauthor::  Christian Hausknecht <christian.hausknecht@gmx.de>
+"""
+
+import os
+import sys
+import pickle
+import time
+import random
+import shutil
+import tempfile
+import subprocess
+import unittest
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from decision_table import numpy, load, evaluate_many, evaluate_batch, \
+                           evaluate_stream, TableCache, CompiledTable, \
+                           IndexedTable, is_equal, tuple_to_mask
+from decision_tree import DecisionTree
+from analyzer import find_shadowed, find_overlaps, count_overlaps, \
+                     find_gaps, cube_to_rule, analyze
+from minimizer import minimize
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def example(name):
+    return os.path.join(HERE, name)
+
+
+def first_match(tuple_, table):
+    """
+    The reference: the linear search of `decision_table.evaluate`.
+
+    :returns: index of the first matching rule or None
+    """
+    for index, (rule, _) in enumerate(table["rules"]):
+        if is_equal(tuple_, rule):
+            return index
+    return None
+
+
+def random_boolean_table(generator, width, size):
+    rules = [[[generator.choice((True, False, None)) for _ in range(width)],
+              [generator.choice("abc")]] for _ in range(size)]
+    return {"conditions": ["c{}".format(i) for i in range(width)],
+            "actions": {"a": "A", "b": "B", "c": "C"}, "rules": rules}
+
+
+def random_sparse_table(generator, width, size):
+    """
+    A table whose rules fix only every fifth condition on average, which
+    makes them overlap a lot.
+    """
+    rules = [[[None if generator.random() < 0.8 else generator.random() < 0.5
+               for _ in range(width)], [generator.choice("ab")]]
+             for _ in range(size)]
+    return {"conditions": ["c{}".format(i) for i in range(width)],
+            "actions": {"a": "A", "b": "B"}, "rules": rules}
+
+
+def all_tuples(width):
+    return [[bool(number >> i & 1) for i in range(width)]
+            for number in range(1 << width)]
+
+
+def cube_tuples(cube, width):
+    rule = cube_to_rule(cube, width)
+    return [tuple_ for tuple_ in all_tuples(width)
+            if is_equal(tuple_, rule)]
+
+
+VALUES = ["a", "b", "c", 1, 5, 10, 2.5]
+
+
+def random_entry(generator):
+    kind = generator.randrange(5)
+    if kind == 0:
+        return None
+    if kind == 1:
+        return generator.choice(VALUES)
+    if kind == 2:
+        return generator.sample(VALUES, generator.randint(1, 3))
+    bounds = sorted(generator.sample([0, 1, 3, 5, 8, 10], 2))
+    if kind == 3:
+        return {"min": bounds[0], "max": bounds[1]}
+    return generator.choice(({"min": bounds[0]}, {"max": bounds[1]}))
+
+
+class EquivalenceTest(unittest.TestCase):
+    """
+    Compares the fast evaluations and the analysis of random tables with
+    a brute force search over all tuples.
+    """
+
+    width = 5
+
+    def setUp(self):
+        self.generator = random.Random(4711)
+
+    def tables(self, count=150):
+        for _ in range(count):
+            yield random_boolean_table(self.generator, self.width,
+                                       self.generator.randint(1, 14))
+
+    def test_evaluations(self):
+        tuples = all_tuples(self.width)
+        for table in self.tables():
+            expected = [first_match(tuple_, table) for tuple_ in tuples]
+            compiled = CompiledTable(table)
+            indexed = IndexedTable(table)
+            tree = DecisionTree(table)
+            for tuple_, index in zip(tuples, expected):
+                self.assertEqual(compiled.find(tuple_to_mask(tuple_)), index)
+                self.assertEqual(indexed.find(tuple_), index)
+                self.assertEqual(tree.find(tuple_), index)
+            if numpy is not None:
+                self.assertEqual(evaluate_many(tuples, table).tolist(),
+                                 [-1 if index is None else index
+                                  for index in expected])
+
+    def test_value_tables(self):
+        tuples = [[first, second, third] for first in VALUES
+                  for second in VALUES + [0, 3, 7, 12] for third in VALUES]
+        for _ in range(150):
+            table = {"conditions": ["x", "y", "z"], "actions": {},
+                     "rules": [[[random_entry(self.generator)
+                                 for _ in range(3)], []]
+                               for _ in range(self.generator.randint(1, 8))]}
+            indexed = IndexedTable(table)
+            for tuple_ in tuples:
+                self.assertEqual(indexed.find(tuple_),
+                                 first_match(tuple_, table))
+
+    def test_analyzer(self):
+        tuples = all_tuples(self.width)
+        for table in self.tables():
+            expected = [first_match(tuple_, table) for tuple_ in tuples]
+            rules = table["rules"]
+            shadowed = set(index for index in range(len(rules))
+                           if index not in expected)
+            self.assertEqual(set(index for index, _
+                                 in find_shadowed(table)), shadowed)
+            gaps = [tuple_ for tuple_, index in zip(tuples, expected)
+                    if index is None]
+            found = [tuple_ for cube in find_gaps(table)
+                     for tuple_ in cube_tuples(cube, self.width)]
+            self.assertEqual(sorted(found), sorted(gaps))
+            overlaps = set()
+            for tuple_ in tuples:
+                matching = [index for index, (rule, _) in enumerate(rules)
+                            if is_equal(tuple_, rule)]
+                overlaps.update((first, later) for first in matching
+                                for later in matching if first < later
+                                and rules[first][1] != rules[later][1])
+            self.assertEqual(set((index, later) for index, later, _
+                                 in find_overlaps(table)), overlaps)
+            self.assertEqual(count_overlaps(table), len(overlaps))
+            self.assertEqual(find_overlaps(table, 2),
+                             find_overlaps(table)[:2])
+
+    def test_minimizer(self):
+        tuples = all_tuples(self.width)
+        for table in self.tables():
+            minimized = minimize(table)
+            for tuple_ in tuples:
+                index = first_match(tuple_, table)
+                other = first_match(tuple_, minimized)
+                self.assertEqual(index is None, other is None)
+                if index is not None:
+                    self.assertEqual(table["rules"][index][1],
+                                     minimized["rules"][other][1])
+
+
+class AnalyzerScalingTest(unittest.TestCase):
+    """
+    Tables with 40 conditions must be analysed in seconds. The bounds 
+    leave room for slow machines.
+    """
+
+    width = 40
+
+    def setUp(self):
+        self.generator = random.Random(4711)
+
+    def assertNoRule(self, cubes, table):
+        for cube in cubes:
+            rule = cube_to_rule(cube, self.width)
+            for other, _ in table["rules"]:
+                self.assertTrue(any(value is not None and 
+                                    other_value is not None and 
+                                    value != other_value for value, 
+                                    other_value in zip(rule, other)))
+
+    def test_analyze(self):
+        table = random_sparse_table(self.generator, self.width, 1000)
+        start = time.time()
+        report = analyze(table)
+        self.assertLess(time.time() - start, 30)
+        self.assertEqual(len(report["overlaps"]), 100)
+        self.assertGreater(report["overlap_count"], 100)
+        self.assertEqual(len(report["gaps"]), 100)
+        self.assertNoRule(report["gaps"], table)
+
+    def test_gaps_of_a_covering_table(self):
+        table = random_sparse_table(self.generator, self.width, 2000)
+        start = time.time()
+        gaps = find_gaps(table, 100)
+        self.assertLess(time.time() - start, 30)
+        self.assertNoRule(gaps, table)
+
+
+class BatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, text):
+        filename = os.path.join(self.directory, "rules.txt")
+        with open(filename, "w") as outfile:
+            outfile.write(text)
+        return filename
+
+    @unittest.skipIf(numpy is None, "needs NumPy")
+    def test_empty_file(self):
+        table = load(example("wiki_en_example.json"))
+        result = evaluate_batch(self.write(""), table)
+        self.assertEqual(result.tolist(), [])
+
+    @unittest.skipIf(numpy is None, "needs NumPy")
+    def test_rules(self):
+        table = load(example("wiki_en_example.json"))
+        result = evaluate_batch(self.write("TTF\nfff\n"), table)
+        self.assertEqual(result.tolist(), [1, 7])
+
+    @unittest.skipIf(numpy is None, "needs NumPy")
+    def test_one_result_per_line(self):
+        table = load(example("wiki_en_example.json"))
+        result = evaluate_batch(self.write("TTF\n\nFFF\n  \nTT\nTXF\nfft\n"),
+                                table)
+        self.assertEqual(result.tolist(), [1, -1, 7, -1, -1, -1, 6])
+
+
+class StreamTest(unittest.TestCase):
+
+    def test_one_line_per_input_line(self):
+        table = load(example("wiki_en_example.json"))
+        outfile = StringIO()
+        count = evaluate_stream(StringIO("TTF\n\nFFF\n  \nxx\n"), outfile,
+                                table)
+        self.assertEqual(count, 5)
+        self.assertEqual(outfile.getvalue().splitlines(),
+                         ["1\tink,jam", "-1\t", "7\t", "-1\t", "-1\t"])
+
+
+class CacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "table.json")
+        shutil.copy(example("wiki_en_example.json"), self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_pickle_is_reused(self):
+        TableCache().get(self.filename)
+        cache = TableCache()
+        cache.get(self.filename)
+        self.assertEqual(cache.stats()["disk_hits"], 1)
+
+    def test_other_version_is_ignored(self):
+        cache = TableCache()
+        table = cache.get(self.filename)
+        with open(self.filename + ".pickle", "wb") as outfile:
+            pickle.dump((cache.PICKLE_FORMAT, cache.PICKLE_VERSION - 1,
+                         cache.signature(self.filename), table), outfile)
+        cache = TableCache()
+        cache.get(self.filename)
+        self.assertEqual(cache.stats()["disk_hits"], 0)
+
+    def test_old_layout_is_ignored(self):
+        cache = TableCache()
+        table = cache.get(self.filename)
+        with open(self.filename + ".pickle", "wb") as outfile:
+            pickle.dump((cache.signature(self.filename), table), outfile)
+        cache = TableCache()
+        cache.get(self.filename)
+        self.assertEqual(cache.stats()["disk_hits"], 0)
+
+    def test_failed_write_leaves_no_temporary_file(self):
+        # the pickle file cannot be replaced by a file
+        os.mkdir(self.filename + ".pickle")
+        TableCache().get(self.filename)
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         ["table.json", "table.json.pickle"])
+
+
+class ValueTableCommandLineTest(unittest.TestCase):
+    """
+    Runs the sample table with value conditions through every mode of
+    the command line tools.
+    """
+
+    table = example("frage_28_werte.json")
+
+    def run_script(self, script, *args, **kwargs):
+        process = subprocess.Popen([sys.executable, example(script)] +
+                                   list(args), stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE,
+                                   universal_newlines=True)
+        output, errors = process.communicate(kwargs.get("input", ""))
+        return process.returncode, output, errors
+
+    def test_rule(self):
+        code, output, _ = self.run_script("decision_table.py", self.table,
+                                          "CH,42,F")
+        self.assertEqual(code, 0)
+        self.assertIn("Rabatt von 10%", output)
+
+    def test_stream(self):
+        code, output, _ = self.run_script("decision_table.py", self.table,
+                                          "--stream",
+                                          input="CH,42,F\nDE,1,T\nCH\n")
+        self.assertEqual(code, 0)
+        self.assertEqual(output.splitlines(),
+                         ["1\tversichern,rabatt", "0\t", "-1\t"])
+
+    def test_batch(self):
+        code, _, errors = self.run_script("decision_table.py", self.table,
+                                          "--batch", os.devnull)
+        self.assertEqual(code, 2)
+        self.assertIn("--batch needs a table with boolean", errors)
+
+    def test_stream_and_batch(self):
+        code, _, errors = self.run_script("decision_table.py", self.table,
+                                          "--stream", "--batch", os.devnull)
+        self.assertEqual(code, 2)
+        self.assertIn("can not be combined", errors)
+
+    def test_minimize(self):
+        code, _, errors = self.run_script("decision_table.py", self.table,
+                                          "--minimize")
+        self.assertEqual(code, 2)
+        self.assertIn("--minimize needs a table with boolean", errors)
+
+    def test_analyzer(self):
+        code, _, errors = self.run_script("analyzer.py", self.table)
+        self.assertEqual(code, 2)
+        self.assertIn("only tables with boolean conditions", errors)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+# coding: utf-8
+
+#
+#
+#       This program is free software; you can redistribute it and/or modify
+#       it under the terms of the GNU General Public License as published by
+#       the Free Software Foundation; either version 2 of the License, or
+#       (at your option) any later version.
+#
+#       This program is distributed in the hope that it will be useful,
+#       but WITHOUT ANY WARRANTY; without even the implied warranty of
+#       MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#       GNU General Public License for more details.
+#
+#       You should have received a copy of the GNU General Public License
+#       along with this program; if not, write to the Free Software
+#       Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#       MA 02110-1301, USA.
+#
+#
+
+
+"""
+    ~~~~~~~~~~~~~
+    aggregates.py
+    ~~~~~~~~~~~~~
+
+    A cache for the key figures of ``scale.py`` (count, extremes, last
+    entry, running sums), which is stored in ``FILE.stats`` next to the
+    data file. So they need not be computed from all entries on every
+    run, but are only updated for a new entry. The cache is written only
+    by ``--add`` and ``--compact``; a run showing the data computes the
+    figures while printing the history, if the cache is out of date.
+
+    The cache holds a fingerprint of the data file and its journal: the
+    size, the modification time and a hash of the last block of each
+    file. Hashing the whole file would cost as much as computing the
+    figures again; as entries are only appended, a changed file differs
+    in its size or its end anyway. If the fingerprint does not match,
+    e.g. because the file was edited by hand, the cache is ignored.
+
+    .. moduleauthor:: Christian Hausknecht <christian.hausknecht@gmx.de>
+
+"""
+
+import os
+import json
+import hashlib
+
+import journal
+
+
+VERSION = 1
+
+# number of bytes at the end of a file, which are hashed
+BLOCK_SIZE = 4096
+
+
+def cache_name(filename):
+    return filename + ".stats"
+
+
+def fingerprint(filename):
+    """
+    :returns: list with [size, mtime, hash] of the data file and its
+              journal or None for a missing file
+    """
+    result = []
+    for name in (filename, journal.journal_name(filename)):
+        try:
+            with open(name, "rb") as infile:
+                info = os.fstat(infile.fileno())
+                infile.seek(max(0, info.st_size - BLOCK_SIZE))
+                digest = hashlib.sha1(infile.read()).hexdigest()
+        except (IOError, OSError):
+            result.append(None)
+            continue
+        result.append([info.st_size, info.st_mtime, digest])
+    return result
+
+
+def read(filename):
+    """
+    reads the cached figures of a data file.
+
+    :returns: dict or None, if there is no cache or it is out of date
+    """
+    try:
+        with open(cache_name(filename), "r") as infile:
+            data = json.load(infile)
+    except (IOError, ValueError):
+        return None
+    if data.get("version") != VERSION or \
+            data.get("fingerprint") != fingerprint(filename):
+        return None
+    return data["statistics"]
+
+
+def write(filename, statistics):
+    """
+    stores the figures of a data file together with its current
+    fingerprint.
+
+    :param statistics: dict, which can be dumped as JSON
+    """
+    data = {"version": VERSION, "fingerprint": fingerprint(filename),
+            "statistics": statistics}
+    tmpname = cache_name(filename) + ".tmp"
+    with open(tmpname, "w") as outfile:
+        json.dump(data, outfile)
+    os.rename(tmpname, cache_name(filename))
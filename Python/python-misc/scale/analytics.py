@@ -0,0 +1,246 @@
+# coding: utf-8
+
+#
+#
+#       This program is free software; you can redistribute it and/or modify
+#       it under the terms of the GNU General Public License as published by
+#       the Free Software Foundation; either version 2 of the License, or
+#       (at your option) any later version.
+#
+#       This program is distributed in the hope that it will be useful,
+#       but WITHOUT ANY WARRANTY; without even the implied warranty of
+#       MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#       GNU General Public License for more details.
+#
+#       You should have received a copy of the GNU General Public License
+#       along with this program; if not, write to the Free Software
+#       Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#       MA 02110-1301, USA.
+#
+#
+
+
+"""
+    ~~~~~~~~~~~~
+    analytics.py
+    ~~~~~~~~~~~~
+
+    Trend, smoothing and forecast for the weight entries of ``scale.py``,
+    computed with NumPy on two columns: the days (as day ordinals) and
+    the weights. ``columns`` gets them from a list of entries or a
+    ``History`` without copying the latter; ``map_columns`` maps the
+    records of a binary file into memory.
+
+        days, weights = map_columns("weights.bin")
+        smooth = ema(weights, 0.1)
+        slope, intercept = theil_sen(days, weights)
+        print(days_to_target(days, weights, 75000))
+
+    The mean of the daily changes used by ``scale.average`` only depends
+    on the first and the last entry, so a single outlier at either end
+    distorts the forecast. The Theil-Sen estimator takes the median of
+    the slopes between pairs of entries instead and ignores up to 29%
+    outliers; for long histories it is computed on a random sample of
+    pairs.
+
+    .. moduleauthor:: Christian Hausknecht <christian.hausknecht@gmx.de>
+
+"""
+
+from __future__ import division
+
+import os
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from history import History, HEADER, RECORD, to_ordinal
+
+
+# number of pairs, on which the Theil-Sen slope is computed
+SAMPLES = 100000
+
+# largest factor, by which the values of a block of ``ema`` are scaled
+EMA_RANGE = 1e100
+
+
+def columns(values):
+    """
+    :param values: list of entries or ``History``
+
+    :returns: days, weights (numpy arrays)
+    """
+    if numpy is None:
+        raise Exception("columns needs NumPy!")
+    if isinstance(values, History):
+        if not len(values):
+            return numpy.zeros(0, numpy.intc), numpy.zeros(0, numpy.intc)
+        return (numpy.frombuffer(values.dates, dtype=numpy.intc),
+                numpy.frombuffer(values.values, dtype=numpy.intc))
+    days = numpy.fromiter((to_ordinal(entry["date"]) for entry in values),
+                          dtype=numpy.int64, count=len(values))
+    weights = numpy.fromiter((entry["value"] for entry in values),
+                             dtype=numpy.int64, count=len(values))
+    return days, weights
+
+
+def map_columns(filename):
+    """
+    maps the records of a binary file of ``history.py`` into memory. An
+    incomplete record at the end is ignored.
+
+    :returns: days, weights (numpy arrays)
+    """
+    if numpy is None:
+        raise Exception("map_columns needs NumPy!")
+    count = (os.path.getsize(filename) - HEADER.size) // RECORD.size
+    if count <= 0:
+        return numpy.zeros(0, "<i4"), numpy.zeros(0, "<i4")
+    records = numpy.memmap(filename, "<i4", mode="r", offset=HEADER.size,
+                           shape=(count, 2))
+    return records[:, 0], records[:, 1]
+
+
+def rolling_mean(weights, window):
+    """
+    calculates the mean of each weight and its ``window - 1``
+    predecessors. The first entries have less predecessors, so their
+    mean is taken over all entries up to them.
+
+    :returns: numpy array of floats
+    """
+    weights = numpy.asarray(weights, dtype=float)
+    if window < 1:
+        raise Exception("The window must contain one entry at least!")
+    sums = numpy.cumsum(weights)
+    sums[window:] = sums[window:] - sums[:-window]
+    sums /= window
+    head = min(window, len(weights))
+    sums[:head] *= window / numpy.arange(1, head + 1)
+    return sums
+
+
+def ema(weights, alpha=0.1):
+    """
+    calculates the exponential moving average
+
+        smooth[0] = weights[0]
+        smooth[i] = alpha * weights[i] + (1 - alpha) * smooth[i - 1]
+
+    Written out, ``smooth[i]`` is ``(1 - alpha) ** i`` times a cumulative
+    sum of the weights scaled by ``(1 - alpha) ** -k``. So the array is
+    processed in blocks, which are short enough, that the scale factors
+    stay below ``EMA_RANGE``; within a block there is no Python loop.
+
+    :returns: numpy array of floats
+    """
+    weights = numpy.asarray(weights, dtype=float)
+    if not 0 < alpha <= 1:
+        raise Exception("alpha must be in (0, 1]!")
+    if alpha == 1 or not len(weights):
+        return weights.copy()
+    decay = 1 - alpha
+    size = max(1, min(len(weights),
+                      int(math.log(EMA_RANGE) / -math.log(decay))))
+    powers = decay ** numpy.arange(size)
+    result = numpy.empty_like(weights)
+    previous = weights[0]
+    for start in range(0, len(weights), size):
+        block = weights[start:start + size]
+        factors = powers[:len(block)]
+        sums = numpy.cumsum(block / factors)
+        block_result = factors * (decay * previous + alpha * sums)
+        result[start:start + size] = block_result
+        previous = block_result[-1]
+    return result
+
+
+def resample(days, weights, period=1):
+    """
+    groups the entries into buckets of ``period`` days and calculates
+    the mean weight of each bucket. With a period of 7 the buckets are
+    calendar weeks starting on Monday. Empty buckets are left out.
+
+    :returns: first day of each bucket, mean weights (numpy arrays)
+    """
+    days = numpy.asarray(days, dtype=numpy.int64)
+    if not len(days):
+        return days.copy(), numpy.zeros(0)
+    # the day ordinal 1 is a Monday
+    buckets = (days - 1) // period
+    first = buckets.min()
+    buckets -= first
+    counts = numpy.bincount(buckets)
+    sums = numpy.bincount(buckets, weights=numpy.asarray(weights, float))
+    used = numpy.flatnonzero(counts)
+    return (used + first) * period + 1, sums[used] / counts[used]
+
+
+def linear_fit(days, weights):
+    """
+    fits a line ``weight = slope * day + intercept`` by least squares.
+
+    :returns: slope (weight per day), intercept
+    """
+    days = numpy.asarray(days, dtype=float)
+    weights = numpy.asarray(weights, dtype=float)
+    if len(days) < 2:
+        raise Exception("A trend needs two entries at least!")
+    # centering keeps the sums small, as day ordinals are huge
+    day_mean = days.mean()
+    weight_mean = weights.mean()
+    x = days - day_mean
+    spread = numpy.dot(x, x)
+    if not spread:
+        raise Exception("A trend needs entries of different days!")
+    slope = numpy.dot(x, weights - weight_mean) / spread
+    return float(slope), float(weight_mean - slope * day_mean)
+
+
+def theil_sen(days, weights, samples=SAMPLES, seed=0):
+    """
+    fits a line ``weight = slope * day + intercept`` robust against
+    outliers: the slope is the median of the slopes between pairs of
+    entries, the intercept the median of the remaining offsets. If there
+    are more than ``samples`` pairs, ``samples`` random pairs are taken.
+
+    :returns: slope (weight per day), intercept
+    """
+    days = numpy.asarray(days, dtype=float)
+    weights = numpy.asarray(weights, dtype=float)
+    size = len(days)
+    if size < 2:
+        raise Exception("A trend needs two entries at least!")
+    if size * (size - 1) // 2 <= samples:
+        first, second = numpy.triu_indices(size, 1)
+    else:
+        random = numpy.random.RandomState(seed)
+        first = random.randint(0, size, samples)
+        second = random.randint(0, size, samples)
+    dx = days[second] - days[first]
+    valid = dx != 0
+    if not valid.any():
+        raise Exception("A trend needs entries of different days!")
+    slope = numpy.median((weights[second] - weights[first])[valid] /
+                         dx[valid])
+    intercept = numpy.median(weights - slope * days)
+    return float(slope), float(intercept)
+
+
+def days_to_target(days, weights, target, fit=theil_sen):
+    """
+    estimates the number of days after the last entry, until the trend
+    line reaches the target weight.
+
+    :param fit: ``theil_sen`` or ``linear_fit``
+
+    :returns: int or None, if the trend leads away from the target
+    """
+    slope, intercept = fit(days, weights)
+    rest = slope * float(days[-1]) + intercept - target
+    if slope * rest >= 0:
+        return 0 if not rest else None
+    return int(math.ceil(-rest / slope))
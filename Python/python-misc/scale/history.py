@@ -0,0 +1,222 @@
+# coding: utf-8
+
+#
+#
+#       This program is free software; you can redistribute it and/or modify
+#       it under the terms of the GNU General Public License as published by
+#       the Free Software Foundation; either version 2 of the License, or
+#       (at your option) any later version.
+#
+#       This program is distributed in the hope that it will be useful,
+#       but WITHOUT ANY WARRANTY; without even the implied warranty of
+#       MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#       GNU General Public License for more details.
+#
+#       You should have received a copy of the GNU General Public License
+#       along with this program; if not, write to the Free Software
+#       Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#       MA 02110-1301, USA.
+#
+#
+
+
+"""
+    ~~~~~~~~~~
+    history.py
+    ~~~~~~~~~~
+
+    A compact storage for the weight entries of ``scale.py``. Instead of
+    a dict per entry the dates (as day ordinals) and the weights are held
+    in two ``array('i')``, which need 8 bytes per entry.
+
+    The binary file consists of a header of 16 bytes:
+
+        magic "SCALE\\0", version (uint16), target, height (int32 each)
+
+    followed by one record per entry: day ordinal, weight (int32 each).
+    All numbers are little endian. New entries are simply appended to
+    the file, and the records can be mapped into memory, e.g. with
+    ``numpy.memmap(filename, "<i4", offset=HEADER.size)``.
+
+    A ``History`` behaves like the list of entries of the JSON file, so
+    it can be passed to ``scale.dashboard`` directly.
+
+    .. moduleauthor:: Christian Hausknecht <christian.hausknecht@gmx.de>
+
+"""
+
+import os
+import sys
+import json
+import struct
+from array import array
+from datetime import date
+
+
+MAGIC = b"SCALE\0"
+VERSION = 1
+
+HEADER = struct.Struct("<6sHii")
+RECORD = struct.Struct("<ii")
+
+
+def to_ordinal(day):
+    """
+    converts a date or a string like "2012-03-16" into a day ordinal.
+
+    :returns: int
+    """
+    if not isinstance(day, date):
+        day = date(*[int(part) for part in day.split("-")])
+    return day.toordinal()
+
+
+def is_history(filename):
+    """
+    checks whether the file is in the binary format.
+
+    :returns: bool
+    """
+    try:
+        with open(filename, "rb") as infile:
+            return infile.read(len(MAGIC)) == MAGIC
+    except IOError:
+        return False
+
+
+class History(object):
+    """
+    The weight entries as two parallel arrays ``dates`` and ``values``.
+    ``saved`` is the number of entries already written to the file.
+    """
+
+    def __init__(self, target=0, height=0):
+        self.target = target
+        self.height = height
+        self.dates = array('i')
+        self.values = array('i')
+        self.saved = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return {"date": date.fromordinal(self.dates[index]).isoformat(),
+                "value": self.values[index]}
+
+    def __iter__(self):
+        for ordinal, value in zip(self.dates, self.values):
+            yield {"date": date.fromordinal(ordinal).isoformat(),
+                   "value": value}
+
+    def append(self, entry):
+        """
+        appends an entry like ``{"date": "2012-03-16", "value": 89200}``.
+        """
+        self.add(entry["date"], entry["value"])
+
+    def add(self, day, value):
+        self.dates.append(to_ordinal(day))
+        self.values.append(value)
+
+    @classmethod
+    def from_json(cls, data):
+        """
+        :param data: dict with "target", "height" and "values" like in the
+                     JSON file
+
+        :returns: History
+        """
+        history = cls(data["target"], data["height"])
+        for entry in data["values"]:
+            history.append(entry)
+        return history
+
+    def to_json(self):
+        """
+        :returns: dict like in the JSON file
+        """
+        return {"target": self.target, "height": self.height,
+                "values": list(self)}
+
+    @classmethod
+    def import_json(cls, filename):
+        with open(filename, "r") as infile:
+            return cls.from_json(json.load(infile))
+
+    def export_json(self, filename):
+        with open(filename, "w") as outfile:
+            json.dump(self.to_json(), outfile, indent=4)
+
+    def records(self, start=0):
+        """
+        :returns: the entries from ``start`` on in the layout of the file
+                  (array)
+        """
+        data = array('i', [0]) * (2 * (len(self) - start))
+        data[0::2] = self.dates[start:]
+        data[1::2] = self.values[start:]
+        if sys.byteorder == "big":
+            data.byteswap()
+        return data
+
+    def header(self):
+        return HEADER.pack(MAGIC, VERSION, self.target, self.height)
+
+    @classmethod
+    def load(cls, filename):
+        """
+        reads a binary file. An incomplete record at the end, left over
+        by an interrupted write, is ignored.
+
+        :returns: History
+        """
+        with open(filename, "rb") as infile:
+            magic, version, target, height = HEADER.unpack(
+                    infile.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise Exception(u"{} is no weight history!".format(filename))
+            history = cls(target, height)
+            count = (os.fstat(infile.fileno()).st_size - HEADER.size) \
+                    // RECORD.size
+            data = array('i')
+            data.fromfile(infile, 2 * count)
+        if sys.byteorder == "big":
+            data.byteswap()
+        history.dates = data[0::2]
+        history.values = data[1::2]
+        history.saved = count
+        return history
+
+    def save(self, filename):
+        """
+        writes the whole history into a new file, which replaces the old
+        one at once.
+        """
+        tmpname = filename + ".tmp"
+        with open(tmpname, "wb") as outfile:
+            outfile.write(self.header())
+            self.records().tofile(outfile)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.rename(tmpname, filename)
+        self.saved = len(self)
+
+    def flush(self, filename):
+        """
+        writes the header and appends the entries, which are not saved
+        yet, to the file.
+        """
+        if not os.path.exists(filename):
+            self.save(filename)
+            return
+        with open(filename, "r+b") as outfile:
+            outfile.write(self.header())
+            outfile.seek(HEADER.size + self.saved * RECORD.size)
+            self.records(self.saved).tofile(outfile)
+            outfile.truncate()
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        self.saved = len(self)
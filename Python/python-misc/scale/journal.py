@@ -0,0 +1,174 @@
+# coding: utf-8
+
+#
+#
+#       This program is free software; you can redistribute it and/or modify
+#       it under the terms of the GNU General Public License as published by
+#       the Free Software Foundation; either version 2 of the License, or
+#       (at your option) any later version.
+#
+#       This program is distributed in the hope that it will be useful,
+#       but WITHOUT ANY WARRANTY; without even the implied warranty of
+#       MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#       GNU General Public License for more details.
+#
+#       You should have received a copy of the GNU General Public License
+#       along with this program; if not, write to the Free Software
+#       Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#       MA 02110-1301, USA.
+#
+#
+
+
+"""
+    ~~~~~~~~~~
+    journal.py
+    ~~~~~~~~~~
+
+    An append-only journal for the JSON files of ``scale.py``. A new
+    entry is not written by rewriting the whole JSON file, but appended
+    as a single line to ``FILE.journal``:
+
+        {"seq": 8, "date": "2012-03-22", "value": 86500}
+
+    ``seq`` is the position of the entry in the history, starting with
+    1. The JSON file is the snapshot; loading replays all journal
+    entries behind the last entry of the snapshot. Once the journal is
+    large enough, it is compacted: the snapshot is written to a
+    temporary file, synced to disk and renamed over the JSON file, then
+    the journal is removed. If that is interrupted, the remaining
+    journal entries are already part of the snapshot and skipped by
+    their ``seq``. A last line cut off by a crash is skipped when the
+    journal is read and removed from it, before a new entry is appended.
+
+    Writers hold an exclusive lock on ``FILE.lock`` from loading the
+    entries until the new entry is appended or the journal compacted, so
+    two concurrent writers do not give their entries the same ``seq``.
+    Without ``fcntl`` (on Windows) nothing is locked.
+
+    .. moduleauthor:: Christian Hausknecht <christian.hausknecht@gmx.de>
+
+"""
+
+import os
+import json
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+# size of the journal in bytes, from which on it is compacted
+COMPACT_SIZE = 1 << 16
+
+
+def journal_name(filename):
+    return filename + ".journal"
+
+
+def lock(filename):
+    """
+    locks ``FILE.lock`` exclusively and waits for it, if another process
+    holds the lock. The lock is released, when the returned file is
+    closed.
+
+    :returns: file
+    """
+    lockfile = open(filename + ".lock", "a")
+    if fcntl is not None:
+        fcntl.flock(lockfile.fileno(), fcntl.LOCK_EX)
+    return lockfile
+
+
+def sync_directory(filename):
+    """
+    makes a rename in the directory of the file durable.
+    """
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(filename)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def replay(filename, count, truncate=False):
+    """
+    reads the entries of the journal, which are not in the snapshot.
+    A last line without a line end is skipped; any other broken line
+    raises an exception and the journal is left as it is, so no entry
+    behind it gets lost.
+
+    :param count: number of entries in the snapshot
+    :param truncate: removes a skipped last line from the journal, so
+                     the next entry starts on a line of its own; only
+                     for writers holding the ``lock``
+
+    :returns: list of entries
+    """
+    entries = []
+    name = journal_name(filename)
+    try:
+        infile = open(name, "rb")
+    except IOError:
+        return entries
+    with infile:
+        offset = 0
+        for number, line in enumerate(infile, 1):
+            if not line.endswith(b"\n"):
+                # the last line was written only partially before a crash
+                if truncate:
+                    with open(name, "r+b") as outfile:
+                        outfile.truncate(offset)
+                break
+            try:
+                record = json.loads(line.decode("utf-8"))
+                sequence = record["seq"]
+                entry = {"date": record["date"], "value": record["value"]}
+            except (ValueError, KeyError, TypeError):
+                raise Exception(u"Line {} of {} is corrupt: {!r}".format(
+                                number, name, line))
+            offset += len(line)
+            if sequence > count:
+                entries.append(entry)
+    return entries
+
+
+def append(filename, entry, sequence):
+    """
+    appends an entry to the journal and syncs it to disk.
+
+    :param sequence: position of the entry in the history
+
+    :returns: size of the journal in bytes
+    """
+    line = json.dumps({"seq": sequence, "date": entry["date"],
+                       "value": entry["value"]}) + "\n"
+    with open(journal_name(filename), "ab") as outfile:
+        outfile.write(line.encode("utf-8"))
+        outfile.flush()
+        os.fsync(outfile.fileno())
+        return outfile.tell()
+
+
+def write_snapshot(filename, data):
+    """
+    replaces the JSON file atomically by ``data`` and removes the
+    journal afterwards.
+    """
+    tmpname = filename + ".tmp"
+    with open(tmpname, "w") as outfile:
+        json.dump(data, outfile, indent=4)
+        outfile.flush()
+        os.fsync(outfile.fileno())
+    os.rename(tmpname, filename)
+    sync_directory(filename)
+    try:
+        os.remove(journal_name(filename))
+    except OSError:
+        pass
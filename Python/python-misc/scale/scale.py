@@ -34,6 +34,7 @@
 
 from __future__ import division
 
+import os
 import json
 import argparse
 import math
@@ -41,6 +42,11 @@ from datetime import date
 from itertools import izip, chain
 from operator import itemgetter
 
+import journal
+import analytics
+import aggregates
+from history import History, is_history
+
 
 VALUE = itemgetter("value")
 #CHANGE = itemgetter("change")
@@ -110,68 +116,292 @@ def get_limit(values, func=max):
             **func(values, key=VALUE)) 
 
 
-def dashboard(target, height, values):
+class Statistics(object):
+    """
+    collects the key figures of the weight entries in a single pass, so
+    even years of readings need only constant memory. Each entry is
+    passed to ``update``; afterwards the attributes hold:
+    
+        - ``count``: number of entries
+        - ``first``, ``last``: the first and the last entry
+        - ``change``: difference of the last entry to its predecessor
+        - ``minimum``, ``maximum``: the first entry with the lowest and
+          highest weight, so their dates are known as well
+        - ``mean``: average weight
+    
+    The variance of the weights is computed with Welford's algorithm.
+    The figures can be stored with ``to_json`` and restored with
+    ``from_json``, so they can be updated later on.
+    """
+    
+    FIELDS = ("count", "first", "last", "change", "minimum", "maximum",
+              "mean", "squares")
+    
+    def __init__(self, entries=()):
+        self.count = 0
+        self.first = self.last = None
+        self.minimum = self.maximum = None
+        self.change = 0
+        self.mean = 0.0
+        self.squares = 0.0
+        for entry in entries:
+            self.update(entry)
+    
+    def update(self, entry):
+        value = entry["value"]
+        if self.count:
+            self.change = value - self.last["value"]
+            if value > self.maximum["value"]:
+                self.maximum = entry
+            elif value < self.minimum["value"]:
+                self.minimum = entry
+        else:
+            self.first = self.minimum = self.maximum = entry
+        self.last = entry
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.squares += delta * (value - self.mean)
+    
+    def to_json(self):
+        """
+        :returns: dict
+        """
+        return dict((name, getattr(self, name)) for name in self.FIELDS)
+    
+    @classmethod
+    def from_json(cls, data):
+        """
+        :param data: dict like from ``to_json``
+        
+        :returns: Statistics
+        """
+        stats = cls()
+        for name in cls.FIELDS:
+            setattr(stats, name, data[name])
+        return stats
+    
+    @property
+    def average(self):
+        """
+        average change per entry like ``average``
+        
+        :returns: float
+        """
+        return (self.last["value"] - self.first["value"]) / (self.count - 1)
+    
+    @property
+    def difference(self):
+        """
+        difference between maximum and minimum weight like ``difference``
+        
+        :returns: int
+        """
+        return self.maximum["value"] - self.minimum["value"]
+    
+    @property
+    def variance(self):
+        """
+        sample variance of the weights
+        
+        :returns: float
+        """
+        return self.squares / (self.count - 1) if self.count > 1 else 0.0
+
+
+def statistics(filename, values):
+    """
+    gets the key figures from the cache of ``aggregates``. The cache is
+    only written by ``--add`` and ``--compact``, so a run only showing
+    the data leaves no files behind.
+    
+    :returns: Statistics or None, if the cache is missing or out of
+              date
+    """
+    data = aggregates.read(filename)
+    if data is not None and data["count"] == len(values):
+        return Statistics.from_json(data)
+    return None
+
+
+def dashboard(target, height, values, stats=None, tail=None):
+    """
+    prints the history and the key figures. If ``stats`` are passed,
+    they are not computed again; with ``tail`` only the last entries of
+    the history are printed, so nothing depends on the number of
+    entries any more.
+    """
+    start = 0 if tail is None else max(0, len(values) - tail)
     print u"--- Verlauf: ---"
-    for item, change in izip(values, changes(values)):
-        item["change"] = change
-        print u"{date}: {value}, {change}".format(**item)
+    if stats is None:
+        stats = Statistics()
+        for index, item in enumerate(values):
+            stats.update(item)
+            if index >= start:
+                print u"{}: {}, {}".format(item["date"], item["value"],
+                        stats.change)
+    elif start < len(values):
+        previous = values[max(0, start - 1)]["value"]
+        for item in values[start:]:
+            print u"{}: {}, {}".format(item["date"], item["value"],
+                    item["value"] - previous)
+            previous = item["value"]
     print
     print "--- Extremwerte: ---"
-    print get_limit(values, func=max)
-    print get_limit(values, func=min)
+    print u"max Gewicht: {value} am {date}".format(**stats.maximum)
+    print u"min Gewicht: {value} am {date}".format(**stats.minimum)
     print
     print u"--- Durchschnitt: ---"
-    avg = average(values)
+    avg = stats.average
     print u"{}g pro Tag {}".format(abs(avg), 
             "abgenommen" if avg < 0 else "zugenommen")
-    diff = difference(values)
+    diff = stats.difference
     print "Gewichts{} gesamt: {}g".format(
             "verlust" if diff > 0 else "zunahme", abs(diff))
     print
     print u"--- Zielwert: ---"
-    rest = VALUE(values[-1]) - target
+    rest = stats.last["value"] - target
     print "Noch {}g bis zum Zielwert".format(rest)
     print "Noch {} Tage bis zum Erreichen".format(
             int(math.ceil(abs(rest / avg))))
-    print "aktueller BMI: {}".format(calc_bmi(values[-1]["value"], height))
-    
+    print "aktueller BMI: {}".format(calc_bmi(stats.last["value"], height))
+
+
+def trend(target, values, window=7):
+    """
+    prints the trend of the weight computed by ``analytics``, which is
+    robust against single outliers.
+    """
+    if analytics.numpy is None:
+        raise Exception("The trend needs NumPy!")
+    days, weights = analytics.columns(values)
+    print
+    print u"--- Trend: ---"
+    print u"gleitender Durchschnitt ({} Werte): {:.0f}g".format(
+            window, analytics.rolling_mean(weights, window)[-1])
+    print u"exponentieller Durchschnitt: {:.0f}g".format(
+            analytics.ema(weights, 2 / (window + 1))[-1])
+    slope, _ = analytics.theil_sen(days, weights)
+    print u"{:.1f}g pro Tag {}".format(abs(slope),
+            "abgenommen" if slope < 0 else "zugenommen")
+    rest = analytics.days_to_target(days, weights, target)
+    if rest is None:
+        print u"Der Trend entfernt sich vom Zielwert"
+    else:
+        print u"Noch {} Tage bis zum Erreichen".format(rest)
+
 
 def add(values, value):
     values.append({"date": str(date.today()), "value": value})
 
 
-def load(filename):
+def load(filename, truncate=False):
+    """
+    loads a JSON file or a binary file of ``history.py``. For the latter
+    the values are a ``History``. ``truncate`` is passed on to
+    ``journal.replay``.
+    
+    :returns: target, height, values
+    """
+    if is_history(filename):
+        history = History.load(filename)
+        return history.target, history.height, history
     try:
         with open(filename, "r") as infile:
             data = json.load(infile)
-            return data["target"], data["height"], data["values"]
     except IOError:
-        return {"target": 0, "height": 0, "values": []}
+        data = {"target": 0, "height": 0, "values": []}
+    values = data["values"]
+    values.extend(journal.replay(filename, len(values), truncate))
+    return data["target"], data["height"], values
 
 
 def dump(filename, target, height, values):
+    if isinstance(values, History):
+        # only the new entries are appended
+        values.target, values.height = target, height
+        return values.flush(filename)
     data = {"target": target, "height": height, "values": values}
-    with open(filename, "w") as outfile:
-        return json.dump(data, outfile, indent=4)
+    journal.write_snapshot(filename, data)
+
+
+def save_entry(filename, target, height, values):
+    """
+    saves the last entry of ``values``. For a JSON file it is appended
+    to its journal; the JSON file is only rewritten, if the journal has
+    grown too large or the file does not exist yet.
+    """
+    if isinstance(values, History):
+        return dump(filename, target, height, values)
+    size = journal.append(filename, values[-1], len(values))
+    if size >= journal.COMPACT_SIZE or not os.path.exists(filename):
+        dump(filename, target, height, values)
+
+
+def convert(filename, target, height, values):
+    """
+    writes the data into a new file: a JSON file if the name ends with
+    ".json", a binary file of ``history.py`` otherwise.
+    """
+    history = History.from_json({"target": target, "height": height,
+                                 "values": values})
+    if filename.endswith(".json"):
+        history.export_json(filename)
+    else:
+        history.save(filename)
 
 
 def main():
     parser = argparse.ArgumentParser(description=u"A simple "\
             "weightening measurement software")
     parser.add_argument("filename", metavar="FILE",
-            help=u"filename of JSON dump file with weight data.")
+            help=u"filename of JSON dump file or binary file with weight "
+                 u"data.")
     parser.add_argument("--add", metavar="WEIGHT", type=int,
             help=u"add a new weight entry in Gramm.")
+    parser.add_argument("--compact", action="store_true",
+            help=u"write the journal of a JSON file into the file.")
+    parser.add_argument("--convert", metavar="OUTFILE",
+            help=u"write the data into OUTFILE: JSON if it ends with "
+                 u"'.json', the compact binary format otherwise.")
+    parser.add_argument("--tail", metavar="N", type=int,
+            help=u"show only the last N entries of the history.")
+    parser.add_argument("--trend", action="store_true",
+            help=u"show the trend of the weight (needs NumPy).")
     args = parser.parse_args()
     
     
-    target, height, values = load(args.filename)
+    writing = args.add or args.compact
+    # the lock is held from loading on, so that a concurrent writer can
+    # not append an entry with the same ``seq``
+    lockfile = journal.lock(args.filename) if writing else None
+    try:
+        target, height, values = load(args.filename, truncate=writing)
+        stats = statistics(args.filename, values)
+        if stats is None and writing:
+            stats = Statistics(values)
+        
+        if args.add:
+            add(values, args.add)
+            save_entry(args.filename, target, height, values)
+            stats.update(values[-1])
+        
+        if args.compact:
+            dump(args.filename, target, height, values)
+        
+        if writing:
+            aggregates.write(args.filename, stats.to_json())
+    finally:
+        if lockfile is not None:
+            lockfile.close()
+    
+    if args.convert:
+        convert(args.convert, target, height, values)
     
-    if args.add:
-        add(values, args.add)
-        dump(args.filename, target, height, values)
+    dashboard(target, height, values, stats, args.tail)
     
-    dashboard(target, height, values)
+    if args.trend:
+        trend(target, values)
     
 
 if __name__ == '__main__':
@@ -0,0 +1,115 @@
+# coding: utf-8
+
+#
+#
+#       This program is free software; you can redistribute it and/or modify
+#       it under the terms of the GNU General Public License as published by
+#       the Free Software Foundation; either version 2 of the License, or
+#       (at your option) any later version.
+#
+#       This program is distributed in the hope that it will be useful,
+#       but WITHOUT ANY WARRANTY; without even the implied warranty of
+#       MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#       GNU General Public License for more details.
+#
+#       You should have received a copy of the GNU General Public License
+#       along with this program; if not, write to the Free Software
+#       Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#       MA 02110-1301, USA.
+#
+#
+
+
+"""
+    ~~~~~~~~~~~~~~~
+    test_journal.py
+    ~~~~~~~~~~~~~~~
+
+    Tests for ``journal.py``; run them with
+
+        python -m unittest test_journal
+
+    .. moduleauthor:: Christian Hausknecht <christian.hausknecht@gmx.de>
+
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import journal
+from journal import fcntl
+
+
+def line(sequence, value):
+    return u'{{"seq": {}, "date": "2012-03-22", "value": {}}}\n'.format(
+            sequence, value).encode("utf-8")
+
+
+class ReplayTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "weights.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, data):
+        with open(journal.journal_name(self.filename), "wb") as outfile:
+            outfile.write(data)
+
+    def read(self):
+        with open(journal.journal_name(self.filename), "rb") as infile:
+            return infile.read()
+
+    def test_entries_behind_snapshot(self):
+        self.write(line(8, 86500) + line(9, 86400) + line(10, 86300))
+        self.assertEqual([entry["value"] for entry
+                          in journal.replay(self.filename, 8)],
+                         [86400, 86300])
+
+    def test_torn_last_line_is_skipped(self):
+        data = line(8, 86500) + line(9, 86400) + line(10, 86300)[:20]
+        self.write(data)
+        self.assertEqual(len(journal.replay(self.filename, 7)), 2)
+        self.assertEqual(self.read(), data)
+
+    def test_torn_last_line_is_truncated_for_writers(self):
+        data = line(8, 86500) + line(9, 86400)
+        self.write(data + line(10, 86300)[:20])
+        self.assertEqual(len(journal.replay(self.filename, 7, True)), 2)
+        self.assertEqual(self.read(), data)
+
+    def test_corrupt_middle_line_keeps_later_entries(self):
+        data = line(8, 86500) + b'{"seq": 9, "da\n' + line(10, 86300)
+        self.write(data)
+        self.assertRaises(Exception, journal.replay, self.filename, 7)
+        self.assertEqual(self.read(), data)
+
+    def test_incomplete_record_is_corrupt(self):
+        data = line(8, 86500) + b'{"seq": 9}\n' + line(10, 86300)
+        self.write(data)
+        self.assertRaises(Exception, journal.replay, self.filename, 7)
+        self.assertEqual(self.read(), data)
+
+    def test_append(self):
+        journal.append(self.filename, {"date": "2012-03-22",
+                                       "value": 86500}, 8)
+        self.assertEqual(journal.replay(self.filename, 7),
+                         [{"date": "2012-03-22", "value": 86500}])
+
+
+    @unittest.skipIf(fcntl is None, "needs fcntl")
+    def test_lock_is_exclusive(self):
+        with journal.lock(self.filename):
+            with open(self.filename + ".lock") as other:
+                self.assertRaises(IOError, fcntl.flock, other.fileno(),
+                                  fcntl.LOCK_EX | fcntl.LOCK_NB)
+        with open(self.filename + ".lock") as other:
+            fcntl.flock(other.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+"""
+    ~~~~~~~~~~~~
+    benchmark.py
+    ~~~~~~~~~~~~
+
+    Measures how the lexers of `sparqllexer` scale on large inputs: the
+    shipped samples are repeated until a synthetic corpus of the given
+    size is reached:
+
+        - SPARQL:     consq_chassis_body.sparql and the keyword dense
+                      keywords.sparql
+        - Turtle:     domain.turtle
+        - Manchester: *.manchester
+
+    For each lexer the tokens per second, the peak memory (via
+    `tracemalloc`, Python 3 only) and the time `IncrementalLexer` needs
+    for re-lexing after editing a line in the middle of the corpus are
+    printed.
+
+    Pathological inputs like unterminated strings are checked by
+    `test_sparqllexer.py`.
+
+    Example call:
+    ~~~~~~~~~~~~~
+
+        ./benchmark.py --size 4000000 --lexer turtle
+
+    .. moduleauthor::  Christian Hausknecht <christian.hausknecht@gmx.de>
+"""
+
+import io
+import os
+import glob
+import argparse
+from timeit import default_timer
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from sparqllexer import SPARQLLexer, TurtleLexer, ManchesterLexer
+from incremental import IncrementalLexer
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SAMPLES = {
+    "sparql": (SPARQLLexer, ["consq_chassis_body.sparql"]),
+    "sparql-keywords": (SPARQLLexer, ["keywords.sparql"]),
+    "turtle": (TurtleLexer, ["domain.turtle"]),
+    "manchester": (ManchesterLexer, sorted(os.path.basename(name) for name
+                   in glob.glob(os.path.join(HERE, "*.manchester"))))
+}
+
+def build_corpus(filenames, size):
+    """
+    Repeats the contents of the given sample files until the corpus has
+    at least `size` characters.
+
+    :returns: unicode
+    """
+    parts = []
+    for filename in filenames:
+        with io.open(os.path.join(HERE, filename), encoding="utf-8") as infile:
+            parts.append(infile.read().rstrip(u"\n") + u"\n")
+    sample = u"".join(parts)
+    return sample * (size // len(sample) + 1)
+
+
+def count_tokens(lexer, text):
+    """
+    Lexes the text without the preprocessing of `get_tokens`.
+
+    :returns: number of tokens (int)
+    """
+    count = 0
+    for _ in lexer.get_tokens_unprocessed(text):
+        count += 1
+    return count
+
+
+def measure_throughput(lexer, text, repeat=3):
+    """
+    :returns: number of tokens, best time in seconds
+    """
+    best = None
+    for _ in range(repeat):
+        start = default_timer()
+        tokens = count_tokens(lexer, text)
+        seconds = default_timer() - start
+        best = seconds if best is None else min(best, seconds)
+    return tokens, best
+
+
+def measure_memory(lexer, text):
+    """
+    :returns: peak memory in bytes while lexing or None, if `tracemalloc`
+              is not available
+    """
+    if tracemalloc is None:
+        return None
+    tracemalloc.start()
+    try:
+        count_tokens(lexer, text)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure_edit(lexer, text, repeat=100):
+    """
+    Measures how long re-lexing takes, after a line in the middle of the
+    text is replaced by itself with an additional space.
+
+    :returns: seconds per edit
+    """
+    document = IncrementalLexer(lexer, text)
+    line = len(document.lines) // 2
+    start = default_timer()
+    for _ in range(repeat):
+        document.edit(line, line + 1, u" " + document.lines[line])
+    return (default_timer() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the lexers of '
+                                                 'sparqllexer.')
+    parser.add_argument('--lexer', nargs="+", choices=sorted(SAMPLES),
+                        default=sorted(SAMPLES))
+    parser.add_argument('--size', type=int, default=1 << 20,
+                        help='number of characters of the corpora')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print("{:<15} {:>10} {:>9} {:>8} {:>10} {:>8} {:>8}".format(
+          "lexer", "chars", "tokens", "seconds", "tokens/s", "peak KB",
+          "edit ms"))
+    for name in args.lexer:
+        lexer_class, filenames = SAMPLES[name]
+        lexer = lexer_class()
+        text = build_corpus(filenames, args.size)
+        tokens, seconds = measure_throughput(lexer, text, args.repeat)
+        peak = measure_memory(lexer, text)
+        edit = measure_edit(lexer, text)
+        print("{:<15} {:>10} {:>9} {:>8.3f} {:>10.0f} {:>8} {:>8.3f}"
+              .format(name, len(text), tokens, seconds, tokens / seconds,
+                      "-" if peak is None
+                      else "{:.0f}".format(peak / 1024.0),
+                      edit * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+"""
+    ~~~~~~~~~~~~~~
+    incremental.py
+    ~~~~~~~~~~~~~~
+
+    Re-lexes a document after an edit without lexing the whole document
+    again, e.g. for the preview of an editor.
+
+    The document is lexed line by line with the rules of a `RegexLexer`;
+    the stack of states at the beginning of every line is kept as a
+    checkpoint, the tokens of a line are kept with their columns. After
+    an edit the lexer starts at the first changed line with its
+    checkpoint and stops as soon as a line behind the edit begins with
+    the same stack as before - all following tokens are still valid.
+    So the work for a keystroke depends on the size of the edit and not
+    on the size of the document, unless the edit really changes the
+    rest of it (like opening a string).
+
+    Tokens never span lines: a token containing line ends (like
+    whitespace or a string) is split at them, which does not change the
+    highlighting.
+
+        lexer = IncrementalLexer(SPARQLLexer(), text)
+        # the user replaced line 4 and 5 with a single line
+        first, stop = lexer.edit(4, 6, u"SELECT ?x\\n")
+        for line in range(first, stop):
+            repaint(line, lexer.tokens[line])
+
+    Works for `SPARQLLexer`, `TurtleLexer` and `ManchesterLexer`.
+
+    .. moduleauthor::  Christian Hausknecht <christian.hausknecht@gmx.de>
+"""
+
+from pygments.token import Error, Whitespace, _TokenType
+
+from sparqllexer import change_state
+
+
+ROOT = ('root',)
+
+
+def split_lines(text):
+    """
+    Splits text into lines, which keep their line ends.
+
+    :returns: list of unicode
+    """
+    lines = [line + u"\n" for line in text.split(u"\n")]
+    last = lines.pop()[:-1]
+    if last:
+        lines.append(last)
+    return lines
+
+
+class IncrementalLexer(object):
+    """
+    A document with its tokens, which are updated by `edit`.
+
+    `lines` holds the text of each line, `states` the stack of states at
+    the beginning of each line as a tuple and `tokens` a list of
+    (column, token type, value) for each line.
+    """
+
+    def __init__(self, lexer, text=u""):
+        self.lexer = lexer
+        self.lines = []
+        self.states = []
+        self.tokens = []
+        # stack of states behind the last line
+        self.end_state = ROOT
+        self.edit(0, 0, text)
+
+    @property
+    def text(self):
+        return u"".join(self.lines)
+
+    def lex_line(self, line, stack):
+        """
+        Lexes a single line in the same way as
+        `RegexLexer.get_tokens_unprocessed` does.
+
+        :params stack: tuple of states at the beginning of the line
+
+        :returns: list of (column, token type, value), tuple of states
+                  at the beginning of the next line
+        """
+        lexer = self.lexer
+        tokendefs = lexer._tokens
+        stack = list(stack)
+        statetokens = tokendefs[stack[-1]]
+        tokens = []
+        pos = 0
+        while pos < len(line):
+            for rexmatch, action, new_state in statetokens:
+                match = rexmatch(line, pos)
+                if match:
+                    break
+            else:
+                if line[pos] == u"\n":
+                    # at EOL, reset state to "root"
+                    stack = ['root']
+                    statetokens = tokendefs['root']
+                    tokens.append((pos, Whitespace, u"\n"))
+                else:
+                    tokens.append((pos, Error, line[pos]))
+                pos += 1
+                continue
+            if action is not None:
+                if type(action) is _TokenType:
+                    tokens.append((pos, action, match.group()))
+                else:
+                    tokens.extend(action(lexer, match))
+            pos = match.end()
+            if new_state is not None:
+                change_state(stack, new_state)
+                statetokens = tokendefs[stack[-1]]
+        return tokens, tuple(stack)
+
+    def edit(self, first, last, text):
+        """
+        Replaces the lines `first` up to (excluding) `last` by `text` and
+        lexes the changed lines again. If `text` does not end with a line
+        end, its last line is joined with the line `last`.
+
+        :returns: first, stop - the range of lines with new tokens
+        """
+        if first == len(self.lines) and first and \
+                not self.lines[-1].endswith(u"\n"):
+            # the last line has no line end, so the text continues it
+            first -= 1
+            text = self.lines[first] + text
+        new_lines = split_lines(text)
+        if new_lines and not new_lines[-1].endswith(u"\n") and \
+                last < len(self.lines):
+            new_lines[-1] += self.lines[last]
+            last += 1
+        stack = self.states[first] if first < len(self.states) \
+                else self.end_state
+        self.lines[first:last] = new_lines
+        self.states[first:last] = [None] * len(new_lines)
+        self.tokens[first:last] = [[] for _ in new_lines]
+        line = first
+        changed = first + len(new_lines)
+        while line < len(self.lines):
+            if line >= changed and self.states[line] == stack:
+                # the rest of the tokens is still valid
+                return first, line
+            self.states[line] = stack
+            self.tokens[line], stack = self.lex_line(self.lines[line], stack)
+            line += 1
+        self.end_state = stack
+        return first, line
+
+    def get_tokens(self):
+        """
+        :returns: generator of (token type, value) like
+                  `RegexLexer.get_tokens`, so it can be passed to a
+                  formatter
+        """
+        for tokens in self.tokens:
+            for _, token, value in tokens:
+                yield token, value
@@ -0,0 +1,326 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+"""
+    ~~~~~~~~
+    ldraw.py
+    ~~~~~~~~
+
+    A parser for LDraw files, which are built of lines of these types:
+
+        0 comment or meta command
+        1 colour x y z a b c d e f g h i file    (reference of a sub file)
+        2 colour x1 y1 z1 x2 y2 z2               (line)
+        3 colour x1 y1 z1 ... x3 y3 z3           (triangle)
+        4 colour x1 y1 z1 ... x4 y4 z4           (quadrilateral)
+        5 colour x1 y1 z1 ... x4 y4 z4           (optional line)
+
+    The lines are dispatched on their first field and split at
+    whitespace; that is much faster than running the rules of
+    `LDrawLexer`, which is meant for highlighting. The numbers of each
+    line type are stored in flat arrays: for type 1 the colours in an
+    `array('i')` and 12 floats (position and matrix) per line in an
+    `array('d')`, so even models with hundreds of thousands of lines
+    need little memory.
+
+    Sub files are searched by a `Library` in the given directories and
+    their `parts`, `p` and `models` sub directories, like the official
+    parts library is organized. Every file is parsed only once, no
+    matter how often it is referenced. Multi part files (`0 FILE`) add
+    their parts to the library as well.
+
+        library = Library(["/usr/share/ldraw"])
+        model = library.load("fahrwerk.ldr")
+        missing = library.resolve(model)
+        print(library.count(model))
+
+    .. moduleauthor::  Christian Hausknecht <christian.hausknecht@gmx.de>
+"""
+
+import io
+import os
+import argparse
+from array import array
+
+
+# number of floats of the line types 1 - 5
+FIELDS = {1: 12, 2: 6, 3: 9, 4: 12, 5: 12}
+
+TYPES = dict((str(type_), type_) for type_ in FIELDS)
+
+SUB_DIRECTORIES = ("", "parts", "p", "models")
+
+
+def parse_colour(text):
+    """
+    Colours are numbers of the colour table or direct colours like
+    `0x2FF0000`.
+
+    :returns: int
+    """
+    if text[:2].lower() == "0x":
+        return int(text, 16)
+    return int(text)
+
+
+def normalize(name):
+    """
+    Sub files are referenced case insensitive and with backslashes.
+
+    :returns: unicode
+    """
+    return name.strip().replace(u"\\", u"/").lower()
+
+
+class Model(object):
+    """
+    The contents of one LDraw file.
+
+    `colours[type]` holds the colours of the lines of a type,
+    `values[type]` their numbers; line `i` of type 2 for example has the
+    numbers `values[2][i * 6:(i + 1) * 6]`. `files` holds for every
+    reference the index of its file in `names`. Type 0 lines are kept as
+    text in `meta`.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.meta = []
+        self.colours = dict((type_, array('i')) for type_ in FIELDS)
+        self.values = dict((type_, array('d')) for type_ in FIELDS)
+        self.files = array('i')
+        self.names = []
+        self.name_ids = {}
+
+    def __len__(self):
+        return len(self.meta) + sum(len(colours) for colours
+                                    in self.colours.values())
+
+    def add(self, type_, colour, values, name=None):
+        self.colours[type_].append(colour)
+        self.values[type_].extend(values)
+        if type_ == 1:
+            # the names are cached as written as well, which saves
+            # normalizing them again
+            name_id = self.name_ids.get(name)
+            if name_id is None:
+                key = normalize(name)
+                name_id = self.name_ids.get(key)
+                if name_id is None:
+                    name_id = self.name_ids[key] = len(self.names)
+                    self.names.append(key)
+                self.name_ids[name] = name_id
+            self.files.append(name_id)
+
+    def reference(self, index):
+        """
+        :returns: colour, tuple of 12 floats, name of the sub file
+        """
+        return (self.colours[1][index],
+                tuple(self.values[1][index * 12:(index + 1) * 12]),
+                self.names[self.files[index]])
+
+    def references(self):
+        """
+        :returns: generator of (colour, tuple of 12 floats, name of the
+                  sub file)
+        """
+        for index in range(len(self.files)):
+            yield self.reference(index)
+
+
+def parse(lines, name):
+    """
+    Parses the lines of an LDraw file. A multi part file results in
+    several models, starting with the `0 FILE` lines.
+
+    :params lines: iterable of unicode
+    :params name: name of the file
+
+    :returns: list of `Model`
+    """
+    models = [Model(name)]
+    model = models[0]
+    for number, line in enumerate(lines, 1):
+        fields = line.split(None, 14)
+        if not fields:
+            continue
+        if fields[0] == u"0":
+            text = line.split(None, 1)[1].rstrip() if len(fields) > 1 \
+                   else u""
+            if fields[1:2] == [u"FILE"]:
+                if len(model) or model is not models[0]:
+                    model = Model(text[4:].strip())
+                    models.append(model)
+                else:
+                    # the first part of a multi part file
+                    model.name = text[4:].strip()
+            model.meta.append(text)
+            continue
+        type_ = TYPES.get(fields[0])
+        if type_ is None:
+            raise Exception(u"Unknown line type in line {} of {}: {!r}"
+                            .format(number, name, line))
+        size = FIELDS[type_]
+        if type_ == 1:
+            if len(fields) != 15:
+                raise Exception(u"Line {} of {} has too few fields!"
+                                .format(number, name))
+            filename = fields[14]
+        else:
+            fields = line.split()
+            if len(fields) != size + 2:
+                raise Exception(u"Line {} of {} must have {} fields!"
+                                .format(number, name, size + 2))
+            filename = None
+        try:
+            model.add(type_, parse_colour(fields[1]),
+                      map(float, fields[2:size + 2]), filename)
+        except ValueError as error:
+            raise Exception(u"Invalid number in line {} of {}: {}"
+                            .format(number, name, error))
+    return models
+
+
+class Library(object):
+    """
+    Finds and parses sub files. Each file is parsed only once; files
+    which are not found are remembered as `None`.
+    """
+
+    def __init__(self, paths=()):
+        self.paths = list(paths)
+        self.cache = {}
+
+    def find(self, name):
+        """
+        :returns: path of the file or None
+        """
+        relative = name.replace(u"/", os.sep)
+        for path in self.paths:
+            for sub_directory in SUB_DIRECTORIES:
+                for candidate in (relative, relative.upper()):
+                    filename = os.path.join(path, sub_directory, candidate)
+                    if os.path.isfile(filename):
+                        return filename
+        return None
+
+    def load(self, filename):
+        """
+        Parses a file; the parts of a multi part file are added to the
+        cache.
+
+        :returns: the first `Model` of the file
+        """
+        with io.open(filename, encoding="utf-8", errors="replace") as infile:
+            models = parse(infile, os.path.basename(filename))
+        for model in models:
+            self.cache.setdefault(normalize(model.name), model)
+        return models[0]
+
+    def get(self, name):
+        """
+        :returns: `Model` of the sub file or None, if it is not found
+        """
+        key = normalize(name)
+        if key not in self.cache:
+            filename = self.find(key)
+            self.cache[key] = None if filename is None else \
+                              self.load(filename)
+        return self.cache[key]
+
+    def resolve(self, model):
+        """
+        Loads all sub files referenced by the model directly or
+        indirectly.
+
+        :returns: sorted list of the names of missing sub files
+        """
+        missing = set()
+        seen = set()
+        todo = [model]
+        while todo:
+            for name in todo.pop().names:
+                if name in seen:
+                    continue
+                seen.add(name)
+                sub_model = self.get(name)
+                if sub_model is None:
+                    missing.add(name)
+                else:
+                    todo.append(sub_model)
+        return sorted(missing)
+
+    def count(self, model, memo=None, path=None):
+        """
+        Counts the lines of the types 2 - 5, which the model consists
+        of after inserting all sub files. Missing files count as empty.
+        A file that includes itself directly or indirectly raises an
+        exception.
+
+        :params path: list of the models currently being counted
+
+        :returns: dict of type -> number
+        """
+        memo = {} if memo is None else memo
+        path = [] if path is None else path
+        if id(model) in memo:
+            return memo[id(model)]
+        for index, other in enumerate(path):
+            if other is model:
+                names = [part.name for part in path[index:]]
+                names.append(model.name)
+                raise Exception(u"Cyclic reference of sub files: {}"
+                                .format(u" -> ".join(names)))
+        path.append(model)
+        result = dict((type_, len(model.colours[type_]))
+                      for type_ in FIELDS if type_ != 1)
+        for name_id in model.files:
+            sub_model = self.get(model.names[name_id])
+            if sub_model is not None:
+                for type_, number in self.count(sub_model, memo,
+                                                path).items():
+                    result[type_] += number
+        path.pop()
+        memo[id(model)] = result
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse an LDraw model.')
+    parser.add_argument('infile', help='LDraw file')
+    parser.add_argument('-l', '--library', nargs="*", default=[],
+                        help='directories of the parts library')
+    args = parser.parse_args()
+
+    library = Library(args.library +
+                      [os.path.dirname(os.path.abspath(args.infile))])
+    model = library.load(args.infile)
+    print("{}: {} lines, {} references to {} files".format(
+          model.name, len(model), len(model.files), len(model.names)))
+    missing = library.resolve(model)
+    if missing:
+        print("missing: {}".format(", ".join(missing)))
+    counts = library.count(model)
+    print("lines: {}, triangles: {}, quadrilaterals: {}, optional lines: {}"
+          .format(counts[2], counts[3], counts[4], counts[5]))
+
+
+if __name__ == '__main__':
+    main()
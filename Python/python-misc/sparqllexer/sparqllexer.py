@@ -48,13 +48,82 @@
 import re
 
 # pygments specific imports
-from pygments.lexer import RegexLexer, bygroups, using
+from pygments.lexer import RegexLexer, bygroups, using, include
 from pygments.token import Text, Comment, Keyword, Punctuation, Name, \
-                            Operator, String, Number
+                            Operator, String, Number, Error, Whitespace, \
+                            _TokenType
 from pygments.lexers.templates import DjangoLexer
 
 
-__all__ = ["SPARQLLexer", "TurtleLexer", "ManchesterLexer", "LDrawLexer"]
+__all__ = ["SPARQLLexer", "TurtleLexer", "ManchesterLexer", "LDrawLexer",
+           "iter_tokens"]
+
+# default number of characters read at once by `iter_tokens`
+CHUNK_SIZE = 1 << 20
+
+# minimum number of characters behind the position of the next token, so
+# a rule does not fail only because the rest of its token is not read yet
+LOOKAHEAD = 4096
+
+
+# Strings are lexed in states of their own instead of a single regular
+# expression like `'(''|[^'])*'`: every character is looked at once, and
+# an unterminated string simply runs up to the end of the input. A
+# doubled quote and escapes like `\"` stay part of the string.
+STRING_STATES = {
+    'single-quoted': [
+        (r"[^'\\]+", String.Single),
+        (r"\\.", String.Escape),
+        (r"''", String.Single),
+        (r"'", String.Single, '#pop')
+    ],
+    'double-quoted': [
+        (r'[^"\\]+', String.Double),
+        (r'\\.', String.Escape),
+        (r'""', String.Double),
+        (r'"', String.Double, '#pop')
+    ]
+}
+
+# A decimal like `1.5` or a double like `1.5e3` is a single token; a dot
+# without digits behind it ends a statement.
+NUMBER_STATES = {
+    'numbers': [
+        (r'([0-9]+\.[0-9]*|\.?[0-9]+)e[+-]?[0-9]+', Number.Float),
+        (r'[0-9]*\.[0-9]+', Number.Float),
+        (r'[0-9]+', Number.Integer)
+    ]
+}
+
+
+def lookup(table, default):
+    """
+    Creates a callback for a rule matching whole words, which looks the
+    word up in `table` instead of trying a long alternation of keywords
+    on every position.
+
+    :params table: dict of lower case word -> token type
+    :params default: token type of words not in `table`
+    """
+    def callback(lexer, match):
+        word = match.group()
+        yield match.start(), table.get(word.lower(), default), word
+    return callback
+
+
+SPARQL_WORDS = dict.fromkeys((
+    'base', 'select', 'order', 'by', 'from', 'graph', 'str', 'isuri',
+    'sameterm', 'prefix', 'construct', 'limit', 'named', 'optional',
+    'lang', 'isiri', 'describe', 'offset', 'where', 'union', 'langmatches',
+    'isliteral', 'ask', 'distinct', 'filter', 'datatype', 'regex',
+    'reduced', 'a', 'bound'), Keyword)
+SPARQL_WORDS.update(dict.fromkeys(('true', 'false'), Name.Constant))
+
+MANCHESTER_WORDS = dict.fromkeys((
+    'class', 'prefix', 'subclassof', 'equivalentof', 'individual', 'types',
+    'facts', 'disjointwith', 'int', 'true', 'false'), Keyword)
+MANCHESTER_WORDS.update(dict.fromkeys(('some', 'and', 'or', 'value'),
+                                      Operator.Word))
 
 
 class SPARQLLexer(RegexLexer):
@@ -70,12 +139,9 @@ class SPARQLLexer(RegexLexer):
     tokens = {
         'root': [
             #(r'\{\{.*\}\}', Punctuation, 'tpl'),
-            (r'#.*?\n', Comment.Single),
-            (r'\b(BASE|SELECT|ORDER|BY|FROM|GRAPH|STR|isURI|sameTERM|'
-             r'PREFIX|CONSTRUCT|LIMIT|FROM|NAMED|OPTIONAL|LANG|isIRI|'
-             r'DESCRIBE|OFFSET|WHERE|UNION|LANGMATCHES|isLITERAL|'
-             r'ASK|DISTINCT|FILTER|DATATYPE|REGEX|REDUCED|a|BOUND)\b',
-             Keyword),
+            (r'#[^\n]*\n?', Comment.Single),
+            # whole words, which are no namespace prefix
+            (r'[^\W\d]\w*(?![\w:])', lookup(SPARQL_WORDS, Name.Function)),
             (r'\?[A-Za-z0-9_]+', Name.Variable),
             # this is not SparQL like, but usefull for jinja2 like vars
             (r'(\{\{[A-Za-z0-9_]+\}\})([.;]*)', bygroups(Name.Variable, 
@@ -83,12 +149,10 @@ class SPARQLLexer(RegexLexer):
             (r'(\w+)(:)(\S+)', 
              bygroups(Name.Namespace, Operator, Text)),
             (r'[A-Za-z]+:', Name.Namespace),
-            (r'<http[\w+\d+:/#\.\-_\{\}]+>', String.Other),
-            (r'(true|false)', Name.Constant),
-            (r'[0-9]+', Number.Integer),
-            (r'[0-9]*\.[0-9]+(e[+-][0-9]+)', Number.Float),
-            (r"'(''|[^'])*'", String.Single),
-            (r'"(""|[^"])*"', String.Double),
+            (r'<http[\w+:/#.\-{}]*>?', String.Other),
+            include('numbers'),
+            (r"'", String.Single, 'single-quoted'),
+            (r'"', String.Double, 'double-quoted'),
             (r'[\{\}\(\)\.;,]', Punctuation),
             (r'[<=>&\^]', Operator),
             (r'[\w\d_]+', Name.Function),
@@ -99,6 +163,8 @@ class SPARQLLexer(RegexLexer):
             ('\}\}', Punctuation, '#pop')
         ]
     }
+    tokens.update(STRING_STATES)
+    tokens.update(NUMBER_STATES)
 
 
 class TurtleLexer(RegexLexer):
@@ -113,22 +179,24 @@ class TurtleLexer(RegexLexer):
     flags = re.IGNORECASE
     tokens = {
         'root': [
-            (r'#.*?\n', Comment.Single),
+            (r'#[^\n]*\n?', Comment.Single),
+            (r'<[^<>"{}|^`\\\s]*>', String.Other),
             (r'(@)(prefix)', bygroups(Operator.Word, Keyword)),
             (r'\w+://\S+', String.Other),
             (r'type|range|domain|subPropertyOf', Name.Builtin),
             (r'(\w+)(:)(\w+)', 
                 bygroups(Name.Namespace, Punctuation, Text)),
             (r'(\w+)(:)', bygroups(Name.Namespace, Punctuation)),
-            (r'[0-9]+', Number.Integer),
-            (r'[0-9]*\.[0-9]+(e[+-][0-9]+)', Number.Float),
-            (r"'(''|[^'])*'", String.Single),
-            (r'"(""|[^"])*"', String.Double),
+            include('numbers'),
+            (r"'", String.Single, 'single-quoted'),
+            (r'"', String.Double, 'double-quoted'),
             (r'[\{\}\(\)\.;,^^]', Punctuation),
             (r'\w+', Name.Function),
             (r'\s+', Text)
         ]
     }
+    tokens.update(STRING_STATES)
+    tokens.update(NUMBER_STATES)
 
 
 class ManchesterLexer(RegexLexer):
@@ -143,44 +211,156 @@ class ManchesterLexer(RegexLexer):
     flags = re.IGNORECASE
     tokens = {
         'root': [
-            (r'#.*?\n', Comment.Single),
+            (r'#[^\n]*\n?', Comment.Single),
             (r'(@)(prefix)', bygroups(Operator, Keyword)),
             (r'(\w+)(:)(\w*)',
                 bygroups(Name.Namespace, Punctuation, Text)),
-            (r'<http[\w+\d+:/#\.\-_]+>', String.Other),
-            (r'class|prefix|SubClassOf|EquivalentOf|Individual|Types|Facts'
-                '|DisjointWith|int|true|false',
-                Keyword),
-            (r'some|and|or|value', Operator.Word),
-            (r'[0-9]+', Number.Integer),
-            (r'[0-9]*\.[0-9]+(e[+-][0-9]+)', Number.Float),
-            (r"'(''|[^'])*'", String.Single),
-            (r'"(""|[^"])*"', String.Double),
+            (r'<http[\w+:/#.\-]*>?', String.Other),
+            (r'[^\W\d]\w*', lookup(MANCHESTER_WORDS, Text)),
+            include('numbers'),
+            (r"'", String.Single, 'single-quoted'),
+            (r'"', String.Double, 'double-quoted'),
             (r'[\{\}\(\)\.;:,\^\^]', Punctuation),
             (r'\w+', Text),
             (r'\s+', Text)
         ]
     }
+    tokens.update(STRING_STATES)
+    tokens.update(NUMBER_STATES)
 
 
 class LDrawLexer(RegexLexer):
     """
     Lexer for LDraw files
+
+    The first number of a line is its type: 0 for comments and meta
+    commands, 1 for references of sub files, 2 - 5 for lines, triangles,
+    quadrilaterals and optional lines.
     """
 
     name = 'LDraw'
     aliases = ['ldraw']
-    filenames = ['*.ldr']
+    filenames = ['*.ldr', '*.dat', '*.mpd']
 
-    flags = re.IGNORECASE
     tokens = {
         'root': [
-            (r'0', Number),
-            (r'.*', String)
+            (r'\s+', Text),
+            (r'(0)([ \t]*)(//[^\r\n]*)',
+                bygroups(Keyword, Text, Comment.Single)),
+            (r'(0)([ \t]+)(Name|Author)(:)([^\r\n]*)',
+                bygroups(Keyword, Text, Name.Builtin, Punctuation, String)),
+            # meta commands are written in capitals
+            (r'(0)([ \t]+)(!?[A-Z][A-Z0-9_]*)(?=\s|$)',
+                bygroups(Keyword, Text, Name.Builtin), 'zero'),
+            # everything else is a comment, like the title in line 1
+            (r'(0)([^\r\n]*)', bygroups(Keyword, Comment)),
+            # colour, position, 3x3 matrix and the name of the sub file,
+            # which may contain spaces
+            (r'(1)([ \t]+)(\S+)((?:[ \t]+\S+){12})([ \t]+)([^\r\n]*\S)',
+                bygroups(Keyword, Text, Name.Constant, Number.Float, Text,
+                         String)),
+            # colour and points
+            (r'([2-5])([ \t]+)(\S+)([^\r\n]*)',
+                bygroups(Keyword, Text, Name.Constant, Number.Float)),
+            (r'[^\r\n]+', Error)
         ],
         'zero': [
-            ('Author|Name', Keyword),
-            (':', Punctuation),
-            ('$', Text, '#pop')
+            (r'\r?\n', Text, '#pop'),
+            (r'[ \t]+', Text),
+            (r'-?[0-9]*\.?[0-9]+([eE][+-]?[0-9]+)?(?=\s|$)', Number),
+            (r'"[^"\r\n]*"', String),
+            (r'[A-Z][A-Z0-9_]*(?=\s|$)', Keyword),
+            (r'[^ \t\r\n]+', Text)
         ]
     }
+
+
+def change_state(stack, new_state):
+    """
+    Applies the state transition of a rule to the stack of states in
+    the same way as `RegexLexer.get_tokens_unprocessed` does.
+    """
+    if isinstance(new_state, tuple):
+        for state in new_state:
+            if state == '#pop':
+                if len(stack) > 1:
+                    stack.pop()
+            elif state == '#push':
+                stack.append(stack[-1])
+            else:
+                stack.append(state)
+    elif isinstance(new_state, int):
+        # pop, but keep at least one state on the stack
+        if abs(new_state) >= len(stack):
+            del stack[1:]
+        else:
+            del stack[new_state:]
+    elif new_state == '#push':
+        stack.append(stack[-1])
+
+
+def iter_tokens(lexer, infile, chunk_size=CHUNK_SIZE):
+    """
+    Lexes a file chunk by chunk with the rules of a `RegexLexer`, so the
+    whole text never has to be in memory. The tokens are the same as
+    those of `lexer.get_tokens_unprocessed(infile.read())`.
+
+    A token reaching the end of the characters read so far might go on
+    in the next chunk; then more is read and the token is matched again.
+    Only the current token, `LOOKAHEAD` and the chunk are kept in memory.
+
+    :params lexer: instance of a `RegexLexer`
+    :params infile: file like object opened in text mode
+
+    :returns: generator of (offset, token type, value)
+    """
+    tokendefs = lexer._tokens
+    stack = ['root']
+    statetokens = tokendefs['root']
+    text = u""
+    offset = 0
+    pos = 0
+    eof = False
+    while True:
+        if not eof and len(text) - pos < LOOKAHEAD:
+            # read at least as much as is left, so a long token is not
+            # matched again and again
+            data = infile.read(max(chunk_size, len(text) - pos))
+            text = text[pos:] + data
+            offset += pos
+            pos = 0
+            eof = not data
+            continue
+        if eof and pos >= len(text):
+            return
+        for rexmatch, action, new_state in statetokens:
+            match = rexmatch(text, pos)
+            if match:
+                break
+        else:
+            if text[pos] == '\n':
+                # at EOL, reset state to "root"
+                stack = ['root']
+                statetokens = tokendefs['root']
+                yield offset + pos, Whitespace, u'\n'
+            else:
+                yield offset + pos, Error, text[pos]
+            pos += 1
+            continue
+        if match.end() == len(text) and not eof:
+            # force reading the next chunk
+            text, offset, pos = text[pos:], offset + pos, 0
+            data = infile.read(max(chunk_size, len(text)))
+            text += data
+            eof = not data
+            continue
+        if action is not None:
+            if type(action) is _TokenType:
+                yield offset + pos, action, match.group()
+            else:
+                for start, token, value in action(lexer, match):
+                    yield offset + start, token, value
+        pos = match.end()
+        if new_state is not None:
+            change_state(stack, new_state)
+            statetokens = tokendefs[stack[-1]]
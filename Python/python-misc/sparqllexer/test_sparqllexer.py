@@ -0,0 +1,118 @@
+# coding: utf-8
+
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+"""
+    ~~~~~~~~~~~~~~~~~~~
+    test_sparqllexer.py
+    ~~~~~~~~~~~~~~~~~~~
+
+    Tests for `sparqllexer.py`; run them with
+
+        python -m unittest test_sparqllexer
+
+    Broken literals, IRIs and comments are lexed at two lengths. From
+    the times the growth exponent is estimated; 1 means linear, 2
+    quadratic. Cases above `MAX_EXPONENT` or slower than `BOUND` seconds
+    for the longer input fail, so the rules are guarded against
+    regressions.
+
+    .. moduleauthor::  Christian Hausknecht <christian.hausknecht@gmx.de>
+"""
+
+import math
+import unittest
+from timeit import default_timer
+
+from sparqllexer import SPARQLLexer, TurtleLexer, ManchesterLexer
+
+
+# functions building a broken input of (about) n characters
+ADVERSARIAL = [
+    ("unterminated ' string", lambda n: u"'" + u"a " * (n // 2)),
+    ('unterminated " string', lambda n: u'"' + u"a " * (n // 2)),
+    ("escaped quotes", lambda n: u"'" + u"a''" * (n // 3)),
+    ("unterminated IRI", lambda n: u"<http" + u"a" * n),
+    ("repeated IRI starts", lambda n: u"<http" * (n // 5)),
+    ("comment without newline", lambda n: u"#" * n),
+    ("broken literal in corpus",
+     lambda n: u'"' + u"<http://x.org/a> 'b' \"c\"\n" * (n // 24)),
+]
+
+SIZES = (4000, 64000)
+
+MAX_EXPONENT = 1.5
+
+# maximum seconds for the longer input
+BOUND = 2.0
+
+
+def lex(lexer, text):
+    """
+    Lexes the text without the preprocessing of `get_tokens`.
+
+    :returns: seconds (float), the concatenated token values
+    """
+    start = default_timer()
+    values = [value for _, _, value in lexer.get_tokens_unprocessed(text)]
+    return default_timer() - start, u"".join(values)
+
+
+def growth_exponent(timings):
+    """
+    Estimates the exponent k of t ~ n^k from the first and the last
+    measurement.
+
+    :params timings: list of (n, seconds)
+
+    :returns: float
+    """
+    (n1, t1), (n2, t2) = timings[0], timings[-1]
+    # very fast runs are dominated by the overhead of the lexer
+    t1 = max(t1, 1e-4)
+    t2 = max(t2, 1e-4)
+    return math.log(t2 / t1) / math.log(float(n2) / n1)
+
+
+class AdversarialTest(unittest.TestCase):
+
+    def check(self, lexer):
+        for case, make_text in ADVERSARIAL:
+            timings = []
+            for size in SIZES:
+                text = make_text(size)
+                # the best of three runs is less disturbed by other
+                # processes
+                seconds = min(lex(lexer, text)[0] for _ in range(3))
+                self.assertEqual(lex(lexer, text)[1], text, case)
+                timings.append((size, seconds))
+            self.assertLessEqual(growth_exponent(timings), MAX_EXPONENT,
+                                 case)
+            self.assertLess(timings[-1][1], BOUND, case)
+
+    def test_sparql(self):
+        self.check(SPARQLLexer())
+
+    def test_turtle(self):
+        self.check(TurtleLexer())
+
+    def test_manchester(self):
+        self.check(ManchesterLexer())
+
+
+if __name__ == '__main__':
+    unittest.main()
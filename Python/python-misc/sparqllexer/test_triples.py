@@ -0,0 +1,123 @@
+# coding: utf-8
+
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+"""
+    ~~~~~~~~~~~~~~~
+    test_triples.py
+    ~~~~~~~~~~~~~~~
+
+    Tests for `triples.py`; run them with
+
+        python -m unittest test_triples
+
+    .. moduleauthor::  Christian Hausknecht <christian.hausknecht@gmx.de>
+"""
+
+import io
+import unittest
+
+from triples import iter_triples, RDF_TYPE, RDF_FIRST, RDF_REST, RDF_NIL
+
+
+PREFIX = u"@prefix ex: <http://example.org/> .\n"
+
+A = u"<http://example.org/a>"
+B = u"<http://example.org/b>"
+C = u"<http://example.org/c>"
+D = u"<http://example.org/d>"
+
+
+def read(text, chunk_size=1 << 16):
+    return list(iter_triples(io.StringIO(PREFIX + text), chunk_size))
+
+
+class TriplesTest(unittest.TestCase):
+
+    def test_decimal(self):
+        self.assertEqual(read(u"ex:a ex:b 1.5 .\n"), [(A, B, u"1.5")])
+
+    def test_numbers_before_separators(self):
+        self.assertEqual(read(u"ex:a ex:b 1, .5, 2.5e-3.\n"),
+                         [(A, B, u"1"), (A, B, u".5"), (A, B, u"2.5e-3")])
+
+    def test_escaped_quote(self):
+        self.assertEqual(read(u'ex:a ex:b "x\\"y" .\n'),
+                         [(A, B, u'"x\\"y"')])
+
+    def test_escaped_single_quote_and_backslash(self):
+        self.assertEqual(read(u"ex:a ex:b 'it\\'s', 'a\\\\' .\n"),
+                         [(A, B, u"'it\\'s'"), (A, B, u"'a\\\\'")])
+
+    def test_prefix_expansion(self):
+        self.assertEqual(read(u"@prefix : <http://example.org/> .\n"
+                              u"ex:a :b ex:c .\n"), [(A, B, C)])
+
+    def test_unknown_prefix(self):
+        self.assertRaises(Exception, read, u"ex:a ex:b no:c .\n")
+
+    def test_continuation(self):
+        self.assertEqual(read(u"ex:a a ex:b ;\n    ex:c ex:d, ex:a ;\n.\n"
+                              u"ex:b ex:c ex:d .\n"),
+                         [(A, RDF_TYPE, B), (A, C, D), (A, C, A),
+                          (B, C, D)])
+
+    def test_incomplete_triple(self):
+        self.assertRaises(Exception, read, u"ex:a ex:b ; ex:c ex:d .\n")
+        self.assertRaises(Exception, read, u"ex:a ex:b ex:c\n")
+
+    def test_chunk_boundaries(self):
+        text = (u"ex:a ex:b 'a long literal', \"1\"^^ex:c ;\n"
+                u"    ex:c [ ex:d ( ex:a 2.5 ) ] .\n") * 3
+        expected = read(text)
+        self.assertEqual(len(expected), 24)
+        for chunk_size in (1, 2, 3, 7):
+            self.assertEqual(read(text, chunk_size), expected)
+
+    def test_base(self):
+        self.assertEqual(read(u"@base <http://example.org/x/> .\n"
+                              u"@prefix y: <y#> .\n"
+                              u"<a> y:b <../c> .\n"),
+                         [(u"<http://example.org/x/a>",
+                           u"<http://example.org/x/y#b>", C)])
+
+    def test_blank_node_property_list(self):
+        self.assertEqual(read(u"ex:a ex:b [ ex:c ex:d ; ex:b [] ] .\n"
+                              u"[ ex:c ex:a ] .\n"),
+                         [(u"_:genid1", C, D),
+                          (u"_:genid1", B, u"_:genid2"),
+                          (A, B, u"_:genid1"),
+                          (u"_:genid3", C, A)])
+
+    def test_collection(self):
+        self.assertEqual(read(u"ex:a ex:b ( ex:c ( ) 1 ) .\n"),
+                         [(u"_:genid1", RDF_FIRST, C),
+                          (u"_:genid1", RDF_REST, u"_:genid2"),
+                          (u"_:genid2", RDF_FIRST, RDF_NIL),
+                          (u"_:genid2", RDF_REST, u"_:genid3"),
+                          (u"_:genid3", RDF_FIRST, u"1"),
+                          (u"_:genid3", RDF_REST, RDF_NIL),
+                          (A, B, u"_:genid1")])
+
+    def test_unbalanced_brackets(self):
+        self.assertRaises(Exception, read, u"ex:a ex:b [ ex:c ex:d .\n")
+        self.assertRaises(Exception, read, u"ex:a ex:b ( ex:c ] .\n")
+        self.assertRaises(Exception, read, u"ex:a ex:b ( ex:c, ex:d ) .\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
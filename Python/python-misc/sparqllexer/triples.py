@@ -0,0 +1,343 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+"""
+    ~~~~~~~~~~
+    triples.py
+    ~~~~~~~~~~
+
+    Reads (subject, predicate, object) triples from Turtle files with the
+    token table of `TurtleLexer`, e.g. for loading them into a triple
+    store. The file is lexed chunk by chunk via `sparqllexer.iter_tokens`
+    and every triple is yielded as soon as it is complete, so only the
+    current statement and the prefixes are kept in memory.
+
+    Supported are statements with `;` and `,`, `@prefix` and `@base`
+    declarations, IRIs with or without angle brackets, prefixed names,
+    blank node labels like `_:b1`, blank node property lists `[ ... ]`,
+    collections `( ... )`, literals and the keyword `a`. The terms are
+    returned in N-Triples notation: IRIs in angle brackets, with the
+    prefixes expanded and relative IRIs resolved against the base,
+    literals as they are written. Property lists and collections get
+    blank nodes labelled `_:genid1`, `_:genid2` and so on; a collection
+    is written as a chain of `rdf:first` and `rdf:rest` triples.
+
+        with io.open("domain.turtle", encoding="utf-8") as infile:
+            for subject, predicate, object_ in iter_triples(infile):
+                ...
+
+    From the command line the triples are written as N-Triples:
+
+        ./triples.py domain.turtle > domain.nt
+
+    .. moduleauthor::  Christian Hausknecht <christian.hausknecht@gmx.de>
+"""
+
+import io
+import sys
+import argparse
+import itertools
+
+try:
+    from urllib.parse import urljoin
+except ImportError:
+    from urlparse import urljoin
+
+from pygments.token import Text, Comment, Punctuation, String
+
+from sparqllexer import TurtleLexer, iter_tokens, CHUNK_SIZE
+
+
+RDF = u"http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+RDF_TYPE = u"<{}type>".format(RDF)
+RDF_FIRST = u"<{}first>".format(RDF)
+RDF_REST = u"<{}rest>".format(RDF)
+RDF_NIL = u"<{}nil>".format(RDF)
+
+SEPARATORS = frozenset(u".;,")
+
+# words of their own; `TurtleLexer` has no rule for the square brackets,
+# so they come as error tokens
+DELIMITERS = frozenset(u".;,[]()")
+
+DIRECTIVES = frozenset([u"@prefix", u"@base"])
+
+
+# kinds of tokens for `iter_words`
+COMMENT, TEXT, SEPARATOR, LITERAL, OTHER = range(5)
+
+
+def token_kind(token):
+    if token in Comment:
+        return COMMENT
+    if token in Text:
+        return TEXT
+    if token in Punctuation:
+        return SEPARATOR
+    if token in String and token is not String.Other:
+        return LITERAL
+    return OTHER
+
+
+def iter_words(tokens):
+    """
+    Joins adjacent tokens into words; whitespace, comments, the
+    separators `.`, `;` and `,` and the brackets `[`, `]`, `(` and `)`
+    end a word. A separator or bracket is a word of its own.
+
+    :params tokens: iterable of (offset, token type, value)
+
+    :returns: generator of (offset, token type of the first token,
+              text of the word, length of the leading string)
+    """
+    # the kind of each token type is computed only once, as `in` is
+    # rather slow for token types
+    kinds = {}
+    word = None
+    for offset, token, value in tokens:
+        kind = kinds.get(token)
+        if kind is None:
+            kind = kinds[token] = token_kind(token)
+        delimiter = kind != LITERAL and value in DELIMITERS
+        if kind == TEXT and value.isspace() or kind == COMMENT or \
+                delimiter:
+            if word is not None:
+                yield word
+                word = None
+            if delimiter:
+                yield offset, token, value, 0
+        elif word is None:
+            word = [offset, token, value, len(value) if kind == LITERAL
+                                          else 0]
+        else:
+            if kind == LITERAL and word[3] == len(word[2]):
+                word[3] += len(value)
+            word[2] += value
+    if word is not None:
+        yield word
+
+
+def expand(name, prefixes, offset):
+    """
+    Expands a prefixed name into an IRI.
+
+    :returns: unicode
+    """
+    prefix, _, local = name.partition(u":")
+    if prefix == u"_":
+        return name
+    if prefix not in prefixes:
+        raise Exception(u"Unknown prefix '{}' at character {}!".format(
+                        prefix, offset))
+    return u"<{}{}>".format(prefixes[prefix], local)
+
+
+def resolve(iri, base):
+    """
+    Resolves an IRI in angle brackets against the base IRI.
+
+    :returns: unicode
+    """
+    if base is None:
+        return iri
+    resolved = urljoin(base, iri[1:-1])
+    # `urljoin` drops an empty fragment, as namespaces often end in `#`
+    if iri.endswith(u"#>") and not resolved.endswith(u"#"):
+        resolved += u"#"
+    return u"<{}>".format(resolved)
+
+
+def to_term(word, prefixes, base=None):
+    """
+    Converts a word into a term in N-Triples notation.
+
+    :returns: unicode
+    """
+    offset, token, text, literal = word
+    if literal:
+        # a literal may be followed by a datatype
+        if text[literal:literal + 2] == u"^^":
+            datatype = text[literal + 2:]
+            if datatype.startswith(u"<"):
+                return text[:literal + 2] + resolve(datatype, base)
+            return text[:literal + 2] + expand(datatype, prefixes, offset)
+        return text
+    if text.startswith(u"<"):
+        return resolve(text, base)
+    if token is String.Other:
+        return u"<{}>".format(text)
+    if text == u"a":
+        return RDF_TYPE
+    if u":" in text:
+        return expand(text, prefixes, offset)
+    # numbers and booleans
+    return text
+
+
+def add_term(term, statement, collection, labels, offset):
+    """
+    Adds a term to the current statement or, inside of a collection, as
+    the next item to the collection.
+
+    :params collection: None or a list [first node, last node]
+
+    :returns: list of the completed triples
+    """
+    if collection is None:
+        if len(statement) == 3:
+            raise Exception(u"Missing separator before character {}!"
+                            .format(offset))
+        statement.append(term)
+        return []
+    node = u"_:genid{}".format(next(labels))
+    triples = [(node, RDF_FIRST, term)]
+    if collection[1] is None:
+        collection[0] = node
+    else:
+        triples.insert(0, (collection[1], RDF_REST, node))
+    collection[1] = node
+    return triples
+
+
+def iter_triples(infile, chunk_size=CHUNK_SIZE):
+    """
+    Reads the triples of a Turtle file.
+
+    :params infile: file like object opened in text mode
+
+    :returns: generator of (subject, predicate, object)
+    """
+    prefixes = {}
+    base = None
+    # the enclosing statements and collections of the open brackets as
+    # (bracket, statement, collection)
+    stack = []
+    statement = []
+    collection = None
+    labels = itertools.count(1)
+    directive = None
+    last = None
+    for word in iter_words(iter_tokens(TurtleLexer(), infile, chunk_size)):
+        offset, token, text, _ = word
+        if directive is not None:
+            if text not in DELIMITERS:
+                statement.append(word)
+                continue
+            if directive == u"@prefix":
+                if text != u"." or len(statement) != 2 or \
+                        not statement[0][2].endswith(u":"):
+                    raise Exception(u"Invalid @prefix at character {}!"
+                                    .format(offset))
+                iri = to_term(statement[1], prefixes, base)
+                prefixes[statement[0][2][:-1]] = iri[1:-1]
+            else:
+                if text != u"." or len(statement) != 1:
+                    raise Exception(u"Invalid @base at character {}!"
+                                    .format(offset))
+                base = to_term(statement[0], prefixes, base)[1:-1]
+            directive = None
+            del statement[:]
+        elif text in SEPARATORS:
+            if collection is not None or text == u"." and stack:
+                raise Exception(u"Unclosed '{}' before character {}!"
+                                .format(stack[-1][0], offset))
+            if len(statement) == 3:
+                yield tuple(statement)
+                if text == u".":
+                    del statement[:]
+                elif text == u";":
+                    del statement[1:]
+                else:
+                    statement.pop()
+            elif text == u"." and (not statement or len(statement) == 1
+                                   and last in (u";", u"]")):
+                del statement[:]
+            else:
+                raise Exception(u"Incomplete triple before '{}' at "
+                                u"character {}!".format(text, offset))
+            last = text
+        elif text == u"[":
+            node = u"_:genid{}".format(next(labels))
+            for triple in add_term(node, statement, collection, labels,
+                                   offset):
+                yield triple
+            stack.append((text, statement, collection))
+            statement = [node]
+            collection = None
+            last = None
+        elif text == u"(":
+            stack.append((text, statement, collection))
+            statement = []
+            collection = [None, None]
+        elif text == u"]" or text == u")":
+            if not stack or stack[-1][0] != (u"[" if text == u"]"
+                                             else u"("):
+                raise Exception(u"Unexpected '{}' at character {}!".format(
+                                text, offset))
+            if text == u"]":
+                if len(statement) == 3:
+                    yield tuple(statement)
+                elif len(statement) != 1:
+                    raise Exception(u"Incomplete triple before ']' at "
+                                    u"character {}!".format(offset))
+                term = None
+            elif collection[1] is None:
+                term = RDF_NIL
+            else:
+                yield collection[1], RDF_REST, RDF_NIL
+                term = collection[0]
+            _, statement, collection = stack.pop()
+            if term is not None:
+                for triple in add_term(term, statement, collection, labels,
+                                       offset):
+                    yield triple
+            last = text
+        elif not statement and collection is None and \
+                text.lower() in DIRECTIVES:
+            directive = text.lower()
+        else:
+            for triple in add_term(to_term(word, prefixes, base), statement,
+                                   collection, labels, offset):
+                yield triple
+            last = None
+    if statement or directive is not None or stack:
+        raise Exception(u"Incomplete statement at the end of the file!")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert Turtle into '
+                                                 'N-Triples.')
+    parser.add_argument('infile', help='Turtle file')
+    parser.add_argument('--count', action="store_true",
+                        help='only print the number of triples')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    with io.open(args.infile, encoding="utf-8") as infile:
+        count = 0
+        for triple in iter_triples(infile, args.chunk_size):
+            count += 1
+            if not args.count:
+                sys.stdout.write(u"{} {} {} .\n".format(*triple))
+    if args.count:
+        print(count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+#
+#  Copyright (C) 2010  Christian Hausknecht
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    ~~~~~~~~~~~~
+    benchmark.py
+    ~~~~~~~~~~~~
+    
+    compares the different ways of `translator.py` to translate a text on
+    a random text with the `demo_lexer` (or any other lexer):
+    
+        - translate:    the generator `translate`
+        - text:         `translate_text` with a compiled lexer
+        - tokens:       `translate_tokens`
+        - codegen:      the module generated by `codegen.py`
+    
+    All of them must produce the same result.
+    
+    Example call:
+    ~~~~~~~~~~~~~
+    
+        ./benchmark.py --size 1000000
+    
+    .. moduleauthor:: Christian Hausknecht <christian.hausknecht@gmx.de>    
+"""
+
+import random
+import argparse
+import timeit
+
+from translator import demo_lexer, load, compile_lexer, translate, \
+                       translate_text, translate_tokens
+from codegen import load_generated
+
+
+def random_text(size):
+    chars = u'abcdefghijklmnopqrstuvwxyz  ""\näöü'
+    return u"".join(random.choice(chars) for _ in range(size))
+
+
+def main():
+    parser = argparse.ArgumentParser("Benchmark of the translator.")
+    parser.add_argument("-l", "--lexer",
+                        help="JSON file with a lexer definition.")
+    parser.add_argument("--size", type=int, default=1000000,
+                        help="number of characters of the random text.")
+    args = parser.parse_args()
+    
+    lexer = load(args.lexer) if args.lexer else demo_lexer
+    text = random_text(args.size)
+    compiled = compile_lexer(lexer)
+    module = load_generated(lexer)
+    candidates = [
+        ("translate", lambda: u"".join(translate(text, compiled))),
+        ("text", lambda: translate_text(text, compiled)),
+        ("tokens", lambda: translate_tokens(text, compiled)[0]),
+        ("codegen", lambda: module.translate_chunk(text)[0])
+    ]
+    expected = candidates[0][1]()
+    for name, func in candidates:
+        assert func() == expected, name
+        seconds = min(timeit.repeat(func, number=1, repeat=3))
+        print(u"{:<10} {:8.3f}s {:10.0f} chars/s".format(name, seconds,
+              len(text) / seconds))
+
+
+if __name__ == "__main__":
+    main()
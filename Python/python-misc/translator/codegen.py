@@ -0,0 +1,213 @@
+#  Copyright (C) 2010  Christian Hausknecht
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    ~~~~~~~~~~
+    codegen.py
+    ~~~~~~~~~~
+
+    compiles a lexer definition of `translator.py` into Python source
+    code. The generated module contains a function
+
+        translate_chunk(text, state="root", stack=None)
+
+    which behaves exactly like `translator.translate_chunk`, but does not
+    interpret the rules at all: the states are small integers, each state
+    is a branch of an if-statement and each rule is a comparison with a
+    single character or a test against a set of characters. Those sets
+    are computed by matching each rule against all Latin-1 characters at
+    generation time; other characters are still matched by the regular
+    expression of the rule.
+
+    The generated modules are stored in a cache directory, named by a
+    hash of the lexer definition, and imported from there:
+
+        module = load_generated(demo_lexer)
+        result, state = module.translate_chunk(u'Hallo "Welt"')
+
+    Like `translator.py` it needs Python 3.
+
+    .. moduleauthor:: Christian Hausknecht <christian.hausknecht@gmx.de>
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import hashlib
+import tempfile
+import importlib.util
+
+
+# increase this, if the generated code changes
+VERSION = 1
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "translator")
+
+# characters, which are checked at generation time
+ALPHABET = [chr(code) for code in range(256)]
+
+
+def lexer_hash(lexer):
+    """
+    :returns: SHA1 hex digest of the lexer definition (string)
+    """
+    data = json.dumps([VERSION, lexer], sort_keys=True)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+def rule_condition(index, pattern, chars):
+    """
+    builds the condition of an if-statement for one rule.
+
+    :params index: unique number of the rule within the lexer
+    :params pattern: compiled regular expression of the rule
+    :params chars: characters of `ALPHABET` matched by the rule
+
+    :returns: source code of the condition, source code of constants
+              needed by the condition
+    """
+    if len(chars) == len(ALPHABET) and pattern.pattern == ".":
+        return None, []
+    if len(chars) == 1 and pattern.pattern in (chars[0], re.escape(chars[0])):
+        # a plain character can not match anything else
+        return "ch == {!r}".format(chars[0]), []
+    regex = "P{}".format(index)
+    constants = ["{} = re.compile({!r}, re.DOTALL)".format(regex,
+                                                          pattern.pattern)]
+    fallback = "(ch > MAX and {}.match(ch))".format(regex)
+    if not chars:
+        return fallback, constants
+    if len(chars) == 1:
+        return "ch == {!r} or {}".format(chars[0], fallback), constants
+    name = "S{}".format(index)
+    constants.append("{} = frozenset({!r})".format(name, "".join(chars)))
+    return "ch in {} or {}".format(name, fallback), constants
+
+
+def generate(lexer):
+    """
+    generates the source code of a module for the given lexer.
+
+    :params lexer: a dict with the lexer definition
+
+    :returns: string
+    """
+    names = ["root"] + sorted(state for state in lexer if state != "root")
+    ids = dict((name, i) for i, name in enumerate(names))
+    constants = []
+    body = []
+    counter = 0
+    for state in names:
+        body.append("            {} s == {}:  # {}".format(
+                    "if" if state == "root" else "elif", ids[state], state))
+        keyword = "if"
+        for pattern, value, change in lexer[state]:
+            compiled = re.compile(pattern, re.DOTALL)
+            chars = [char for char in ALPHABET if compiled.match(char)]
+            condition, needed = rule_condition(counter, compiled, chars)
+            constants.extend(needed)
+            counter += 1
+            if condition is None:
+                body.append("                {}:".format(
+                            "if True" if keyword == "if" else "else"))
+            else:
+                body.append("                {} {}:".format(keyword, 
+                                                          condition))
+            keyword = "elif"
+            body.append("                    append({})".format(
+                        "ch" if value == "#token" else repr(value)))
+            if change == "#pop":
+                body.append("                    s = pop()")
+            elif change:
+                body.append("                    push(s)")
+                body.append("                    s = {}".format(ids[change]))
+            if condition is None:
+                break
+        else:
+            # no rule matched; a state without rules never matches
+            indent = "                "
+            if lexer[state]:
+                body.append(indent + "else:")
+                indent += "    "
+            body.append(indent + "raise Exception(u\"No Rule found for "
+                        "token '{}' in state '{}'!\".format(repr(ch), "
+                        "NAMES[s]))")
+    return TEMPLATE.format(
+        hash=lexer_hash(lexer),
+        names=names,
+        constants="\n".join(constants),
+        body="\n".join(body))
+
+
+TEMPLATE = u'''# generated by codegen.py from lexer {hash}; do not edit!
+
+import re
+
+NAMES = {names!r}
+IDS = dict((name, i) for i, name in enumerate(NAMES))
+MAX = u"\\xff"
+
+{constants}
+
+
+def translate_chunk(text, state="root", stack=None):
+    stack = [] if stack is None else stack
+    # states are kept as numbers during the loop
+    ids = [IDS[name] for name in stack]
+    push = ids.append
+    pop = ids.pop
+    result = []
+    append = result.append
+    s = IDS[state]
+    try:
+        for ch in text:
+{body}
+    finally:
+        stack[:] = [NAMES[i] for i in ids]
+    return u"".join(result), NAMES[s]
+'''
+
+
+def load_generated(lexer, cache_dir=None):
+    """
+    imports the generated module for the given lexer. If it is not in
+    the cache yet, it is generated and stored there first.
+
+    :params lexer: a dict with the lexer definition
+    :params cache_dir: directory of the generated modules
+
+    :returns: module
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    name = "lexer_{}".format(lexer_hash(lexer))
+    filename = os.path.join(cache_dir, name + ".py")
+    if not os.path.exists(filename):
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        # write to a temporary file first, so no one sees a half module
+        fd, tmpname = tempfile.mkstemp(".py", name, cache_dir)
+        with io.open(fd, "w", encoding="utf-8") as outfile:
+            outfile.write(generate(lexer))
+        os.rename(tmpname, filename)
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    sys.modules[name] = module
+    return module
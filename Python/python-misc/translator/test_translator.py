@@ -0,0 +1,275 @@
+# coding: utf-8
+
+#
+#  Copyright (C) 2010  Christian Hausknecht
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    ~~~~~~~~~~~~~~~~~~
+    test_translator.py
+    ~~~~~~~~~~~~~~~~~~
+
+    Tests for `translator.py`; the fast modes are compared with the
+    plain `translate` generator. Run them with
+
+        python3 -m unittest test_translator
+
+    .. moduleauthor:: Christian Hausknecht <christian.hausknecht@gmx.de>
+"""
+
+import io
+import os
+import re
+import random
+import shutil
+import tempfile
+import unittest
+
+import translator
+from translator import demo_lexer, translate, translate_text, \
+                       translate_chunk, translate_tokens, translate_stream, \
+                       compile_lexer
+from codegen import load_generated
+
+
+NESTED_LEXER = {
+    "root": [
+        (r'"', "#token", "string"),
+        (r'\(', "[", "paren"),
+        (r'[ \t]', ";", None),
+        (r'[äöü€]', "?", None),
+        (r'.', "#token", None)
+    ],
+    "paren": [
+        (r'\(', "[", "paren"),
+        (r'\)', "]", "#pop"),
+        (r'"', "#token", "string"),
+        (r'.', "#token", None)
+    ],
+    "string": [
+        (r'\\', "#token", "escape"),
+        (r'"', "#token", "#pop"),
+        (r'\n', "\\n", None),
+        (r'.', "#token", None)
+    ],
+    "escape": [
+        (r'.', "#token", "#pop")
+    ]
+}
+
+STATELESS_LEXER = {
+    "root": [
+        (r'[aeiou]', "*", None),
+        (r'\s', "_", None),
+        (r'.', "#token", None)
+    ]
+}
+
+# token rules up to three characters, one with a backreference
+TOKEN_LEXER = {
+    "root": [
+        (r'\r\n', "\n", None),
+        (r'(["\'])\w?\1', "<S>", None),
+        (r'<=|>=', "~", None),
+        (r'\(', "#token", "paren"),
+        (r'.', "#token", None)
+    ],
+    "paren": [
+        (r'(?i)x', "X", None),
+        (r'\)', "#token", "#pop"),
+        (r'.', "#token", None)
+    ]
+}
+
+LEXERS = [demo_lexer, NESTED_LEXER, STATELESS_LEXER]
+
+CHARS = u'aeiouxyz "\\()\t\näöü€\r<=>\'X'
+
+
+def random_texts(generator, count=50):
+    for _ in range(count):
+        yield u"".join(generator.choice(CHARS)
+                       for _ in range(generator.randint(0, 80)))
+
+
+def reference_tokens(text, lexer):
+    """
+    The reference for the token mode: the rules are matched one by one
+    at each position.
+
+    :returns: the transformed string
+    """
+    stack = []
+    state = "root"
+    result = []
+    pos = 0
+    while pos < len(text):
+        for pattern, value, change in lexer[state]:
+            match = re.compile(pattern, re.DOTALL).match(text, pos)
+            if match:
+                break
+        else:
+            raise Exception("no rule")
+        end = max(match.end(), pos + 1)
+        result.append(text[pos:end] if value == "#token" else value)
+        pos = end
+        if change == "#pop":
+            state = stack.pop()
+        elif change:
+            stack.append(state)
+            state = change
+    return u"".join(result)
+
+
+class TranslateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.generator = random.Random(4711)
+
+    def test_text(self):
+        for lexer in LEXERS:
+            for text in random_texts(self.generator):
+                self.assertEqual(translate_text(text, lexer),
+                                 u"".join(translate(text, lexer)))
+
+    def test_chunks(self):
+        for lexer in LEXERS:
+            for text in random_texts(self.generator):
+                state = "root"
+                stack = []
+                result = []
+                for start in range(0, len(text), 3):
+                    chunk, state = translate_chunk(text[start:start + 3],
+                                                   lexer, state, stack)
+                    result.append(chunk)
+                self.assertEqual(u"".join(result),
+                                 u"".join(translate(text, lexer)))
+
+    def test_tokens_of_single_characters(self):
+        for lexer in LEXERS:
+            for text in random_texts(self.generator):
+                self.assertEqual(translate_tokens(text, lexer)[0],
+                                 u"".join(translate(text, lexer)))
+
+    def test_tokens(self):
+        for text in random_texts(self.generator, 200):
+            self.assertEqual(translate_tokens(text, TOKEN_LEXER)[0],
+                             reference_tokens(text, TOKEN_LEXER))
+
+    def test_backreference(self):
+        self.assertEqual(translate_tokens(u"a'b' \"c' ''",
+                                          TOKEN_LEXER)[0],
+                         u"a<S> \"c' <S>")
+
+    def test_inline_flags(self):
+        self.assertEqual(translate_tokens(u"x(xX)x", TOKEN_LEXER)[0],
+                         u"x(XX)x")
+
+
+class CompileTest(unittest.TestCase):
+
+    def test_compiled_once(self):
+        self.assertIs(compile_lexer(dict(demo_lexer)),
+                      compile_lexer(dict(demo_lexer)))
+
+    def test_changed_lexer(self):
+        lexer = {"root": [[" ", "_", None], [".", "#token", None]]}
+        self.assertEqual(translate_text(u"a b", lexer), u"a_b")
+        lexer["root"][0][1] = "-"
+        self.assertEqual(translate_text(u"a b", lexer), u"a-b")
+
+
+class StreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.generator = random.Random(4711)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        translator.LOOKAHEAD = 4096
+        shutil.rmtree(self.directory)
+
+    def stream(self, text, lexer, chunk_size, **kwargs):
+        outfile = io.StringIO()
+        translate_stream(io.StringIO(text), outfile, lexer, chunk_size,
+                         **kwargs)
+        return outfile.getvalue()
+
+    def test_small_chunks(self):
+        for lexer in LEXERS:
+            for text in random_texts(self.generator, 20):
+                expected = u"".join(translate(text, lexer))
+                for chunk_size in (1, 2, 3, 7):
+                    self.assertEqual(self.stream(text, lexer, chunk_size),
+                                     expected)
+
+    def test_small_chunks_of_tokens(self):
+        # tokens may reach over the end of a chunk
+        translator.LOOKAHEAD = 3
+        for text in random_texts(self.generator, 20):
+            expected = reference_tokens(text, TOKEN_LEXER)
+            for chunk_size in (1, 2, 3, 7):
+                self.assertEqual(self.stream(text, TOKEN_LEXER, chunk_size,
+                                             tokens=True), expected)
+
+    def test_mapped_file(self):
+        filename = os.path.join(self.directory, "input.txt")
+        for text in random_texts(self.generator, 20):
+            text = text.replace(u"\r", u"")
+            with io.open(filename, "w", encoding="utf-8") as outfile:
+                outfile.write(text)
+            # multibyte characters are split by small chunks
+            for chunk_size in (1, 2, 5):
+                with io.open(filename, encoding="utf-8") as infile:
+                    outfile = io.StringIO()
+                    translate_stream(infile, outfile, NESTED_LEXER,
+                                     chunk_size)
+                self.assertEqual(outfile.getvalue(),
+                                 u"".join(translate(text, NESTED_LEXER)))
+
+
+class CodegenTest(unittest.TestCase):
+
+    def setUp(self):
+        self.generator = random.Random(4711)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_generated_module(self):
+        for lexer in LEXERS:
+            module = load_generated(lexer, self.directory)
+            for text in random_texts(self.generator):
+                self.assertEqual(module.translate_chunk(text)[0],
+                                 u"".join(translate(text, lexer)))
+
+    def test_state_is_carried(self):
+        module = load_generated(NESTED_LEXER, self.directory)
+        for text in random_texts(self.generator):
+            state = "root"
+            stack = []
+            result = []
+            for start in range(0, len(text), 4):
+                chunk, state = module.translate_chunk(text[start:start + 4],
+                                                      state, stack)
+                result.append(chunk)
+            self.assertEqual(u"".join(result),
+                             u"".join(translate(text, NESTED_LEXER)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,4 @@
-#!/usr/bin/env python2
+#!/usr/bin/env python3
 # coding: utf-8
 
 #
@@ -45,6 +45,30 @@
                 "state_name"    change to state with "state_name"
                 "#pop"          jump back to last state
     
+    Instead of single characters the rules may also be matched against
+    tokens of arbitrary length, see `translate_tokens`. Then a rule like
+    ``["\\r\\n", "\\n", null]`` is possible.
+    
+    Before translating, a lexer is compiled into a `CompiledLexer`: for
+    each state the rules are looked up only once per distinct character
+    and the result is kept in a transition table, which is filled in 
+    advance for all Latin-1 characters. So the regular 
+    expressions are not matched again for every character. If no rule
+    changes the state, the whole text is translated by `str.translate`.
+    `compile_lexer` keeps the recently compiled lexers, so passing the
+    same dict again and again does not compile it every time.
+    
+    The translator needs Python 3: files are read as text in their
+    encoding, so a lexer always sees whole characters and never bytes.
+    
+    Files are translated in chunks by `translate_stream`, which carries
+    the state and the stack from one chunk to the next. Regular files 
+    are memory mapped. With ``--jobs`` the chunks are translated by a 
+    pool of processes (see `translate_parallel`).
+    
+    A lexer definition can be checked for errors in advance by
+    ``--check``, see `validator.py`.
+    
     Example call:
     ~~~~~~~~~~~~~
     
@@ -55,10 +79,30 @@
     .. moduleauthor:: Christian Hausknecht <christian.hausknecht@gmx.de>    
 """
 
-import sys
+import io
+import os
 import re
-import argparse
+import sys
+import mmap
+import stat
 import json
+import codecs
+import locale
+import argparse
+import multiprocessing
+from itertools import islice
+from collections import deque, OrderedDict
+
+# number of characters that are read and translated at once
+CHUNK_SIZE = 1 << 20
+# maximum length of a token that may reach over the end of a chunk
+LOOKAHEAD = 4096
+# characters for which the transition tables are filled in advance
+LATIN1 = [chr(code) for code in range(256)]
+# number of lexer definitions, which are kept compiled
+CACHE_SIZE = 16
+# flags of a pattern without inline flags
+DEFAULT_FLAGS = re.compile(u"", re.DOTALL).flags
 
 #
 # default lexer:
@@ -89,37 +133,405 @@ def load(filename):
         return json.load(infile)
 
 
+class Transitions(dict):
+    """
+    transition table of one state: maps a token onto a tuple of
+    (replacement, change). Unknown tokens are matched against the rules
+    of the state on first access and then stored.
+    """
+    
+    def __init__(self, state, rules):
+        dict.__init__(self)
+        self.state = state
+        self.rules = [(re.compile(pattern, re.DOTALL), value, change)
+                      for pattern, value, change in rules]
+        # all rules as one alternation, which is tried from left to right
+        # just like the rules are; a rule's group name is its index. 
+        # That would renumber the groups of the rules and spread their
+        # inline flags over all of them, so then the rules are matched
+        # one by one.
+        self.scanner = None
+        if all(pattern.groups == 0 and pattern.flags == DEFAULT_FLAGS
+               for pattern, _, _ in self.rules):
+            try:
+                self.scanner = re.compile(u"|".join(u"(?P<_{}>{})".format(
+                        i, pattern) for i, (pattern, _, _) 
+                        in enumerate(rules)), re.DOTALL)
+            except re.error:
+                pass
+    
+    def lookup(self, token):
+        """
+        matches the rules of the state against a token.
+        
+        :returns: (replacement, change) of the first matching rule or
+                  None
+        """
+        for pattern, value, change in self.rules:
+            if pattern.match(token):
+                # Assign replacement character
+                replacement = token if value == "#token" else value
+                return replacement, change
+        return None
+    
+    def fill(self, alphabet):
+        """
+        stores the entries for all characters of `alphabet` in advance,
+        which have a matching rule.
+        """
+        for char in alphabet:
+            if char not in self:
+                entry = self.lookup(char)
+                if entry is not None:
+                    self[char] = entry
+    
+    def __missing__(self, token):
+        entry = self.lookup(token)
+        if entry is None:
+            # No rule matched; could also yield a default char then
+            raise Exception(u"No Rule found for token '{}' in state '{}'!"\
+                            .format(repr(token), self.state))
+        self[token] = entry
+        return entry
+    
+    def match(self, text, pos, longest=False):
+        """
+        matches the rules of the state at position `pos` of `text`. By
+        default the first matching rule wins, with `longest` the one 
+        with the longest match. A rule always consumes at least one 
+        character.
+        
+        :returns: value and change of the rule, end of the match
+        """
+        if not longest and self.scanner is not None:
+            match = self.scanner.match(text, pos)
+            if match:
+                _, value, change = self.rules[int(match.lastgroup[1:])]
+                return value, change, max(match.end(), pos + 1)
+        else:
+            best = None
+            for pattern, value, change in self.rules:
+                match = pattern.match(text, pos)
+                if match and (best is None or match.end() > best[2]):
+                    best = value, change, max(match.end(), pos + 1)
+                    if not longest:
+                        break
+            if best is not None:
+                return best
+        raise Exception(u"No Rule found for token '{}' in state '{}'!"\
+                        .format(repr(text[pos]), self.state))
+
+
+# compiled lexers of `compile_lexer` by their JSON definition, the most
+# recently used last
+compiled_lexers = OrderedDict()
+
+
+class CompiledLexer(object):
+    """
+    a lexer prepared for translation: holds a `Transitions` table for 
+    each state. The tables are filled in advance for all characters of
+    `alphabet`; others are added on their first occurrence.
+    """
+    
+    def __init__(self, lexer, alphabet=LATIN1):
+        self.lexer = lexer
+        self.states = dict((state, Transitions(state, rules)) 
+                           for state, rules in lexer.items())
+        for transitions in self.states.values():
+            transitions.fill(alphabet)
+        self.stateless = all(change is None for rules in lexer.values()
+                             for _, _, change in rules)
+
+
+def compile_lexer(lexer):
+    """
+    compiles a lexer definition, if that is not already done. The last
+    `CACHE_SIZE` compiled definitions are kept, as filling the tables 
+    takes much longer than translating a short string; a definition 
+    that is changed later is compiled again.
+    
+    :params lexer: a dict with the lexer definition or a `CompiledLexer`
+    
+    :returns: CompiledLexer
+    """
+    if isinstance(lexer, CompiledLexer):
+        return lexer
+    key = json.dumps(lexer, sort_keys=True)
+    compiled = compiled_lexers.pop(key, None)
+    if compiled is None:
+        # a copy, so later changes of the dict do not get into the cache
+        compiled = CompiledLexer(json.loads(key))
+    compiled_lexers[key] = compiled
+    if len(compiled_lexers) > CACHE_SIZE:
+        compiled_lexers.popitem(last=False)
+    return compiled
+
+
 def translate(iterable, lexer):
     """
     core function that inherits the state machine.
     
     :params iterable: a iterable (string) that should be transformed
-    :params lexer: a dict with the lexer definition
+    :params lexer: a dict with the lexer definition or a `CompiledLexer`
     
     :yields: the transformed token (string)
     """
+    states = compile_lexer(lexer).states
     stack = []
     state = "root"
+    transitions = states[state]
     for token in iterable:
-        for rules in lexer[state]:
-            pattern, value, change = rules
-            if re.match(pattern, token, re.DOTALL):
-                # Assign replacement character
-                replacement = token if value == "#token" else value
-                # check if there should be a state change
-                if change == "#pop":
-                    state = stack.pop()
-                elif change:
-                    stack.append(state)
-                    state = change
-                break
-        # No rule matched; could also yield a default char then
-        else:
-            raise Exception(u"No Rule found for token '{}' in state '{}'!"\
-                            .format(repr(token), state))
+        replacement, change = transitions[token]
+        # check if there should be a state change
+        if change == "#pop":
+            state = stack.pop()
+            transitions = states[state]
+        elif change:
+            stack.append(state)
+            state = change
+            transitions = states[state]
         yield replacement
 
 
+def translate_chunk(text, lexer, state="root", stack=None):
+    """
+    translates a string, starting in the given state with the given 
+    stack. That way a long text can be translated in several chunks
+    without losing the state at the borders. `stack` is changed in 
+    place.
+    
+    The state machine runs in a plain loop without the overhead of a 
+    generator; a lexer without state changes is applied by 
+    `str.translate`.
+    
+    :params text: the string that should be transformed
+    :params lexer: a dict with the lexer definition or a `CompiledLexer`
+    :params state: the state to start with
+    :params stack: list of the states to return to by "#pop"
+    
+    :returns: the transformed string, the state at the end of the text
+    """
+    compiled = compile_lexer(lexer)
+    if compiled.stateless:
+        transitions = compiled.states[state]
+        table = dict((ord(char), transitions[char][0]) for char in set(text))
+        return text.translate(table), state
+    states = compiled.states
+    stack = [] if stack is None else stack
+    transitions = states[state]
+    result = []
+    append = result.append
+    for token in text:
+        replacement, change = transitions[token]
+        append(replacement)
+        if change:
+            if change == "#pop":
+                state = stack.pop()
+            else:
+                stack.append(state)
+                state = change
+            transitions = states[state]
+    return "".join(result), state
+
+
+def translate_text(text, lexer):
+    """
+    translates a whole string at once. The result is the same as
+    ``"".join(translate(text, lexer))``, but much faster.
+    
+    :params text: the string that should be transformed
+    :params lexer: a dict with the lexer definition or a `CompiledLexer`
+    
+    :returns: the transformed string
+    """
+    return translate_chunk(text, lexer)[0]
+
+
+def translate_tokens(text, lexer, state="root", stack=None, longest=False,
+                     final=True):
+    """
+    translates a string token by token instead of character by 
+    character: at each position the rules of the current state are 
+    matched against the text and the position moves on by the length of
+    the match. So rules like ``\\r\\n`` are possible. With "#token" the
+    whole match is kept.
+    
+    If `final` is not set, more text will follow. Then the translation 
+    stops `LOOKAHEAD` characters before the end, as a token might reach
+    into the next chunk; tokens must not be longer than that.
+    
+    :params text: the string that should be transformed
+    :params lexer: a dict with the lexer definition or a `CompiledLexer`
+    :params state: the state to start with
+    :params stack: list of the states to return to by "#pop"
+    :params longest: use the longest instead of the first match
+    :params final: True if `text` is the end of the input
+    
+    :returns: the transformed string, the state at the end of the text,
+              the position up to which `text` was translated
+    """
+    states = compile_lexer(lexer).states
+    stack = [] if stack is None else stack
+    limit = len(text) if final else len(text) - LOOKAHEAD
+    transitions = states[state]
+    result = []
+    append = result.append
+    pos = 0
+    while pos < limit:
+        value, change, end = transitions.match(text, pos, longest)
+        append(text[pos:end] if value == "#token" else value)
+        pos = end
+        if change:
+            if change == "#pop":
+                state = stack.pop()
+            else:
+                stack.append(state)
+                state = change
+            transitions = states[state]
+    return "".join(result), state, pos
+
+
+def iter_chunks(infile, chunk_size=CHUNK_SIZE):
+    """
+    reads a file in chunks of about `chunk_size` characters. Regular
+    files are memory mapped and decoded incrementally; everything else,
+    like pipes, is read by ``infile.read``.
+    
+    :params infile: a file object opened in text mode
+    
+    :yields: string
+    """
+    try:
+        fileno = infile.fileno()
+        regular = stat.S_ISREG(os.fstat(fileno).st_mode) and \
+                  os.fstat(fileno).st_size > 0
+    except (AttributeError, IOError, OSError, ValueError):
+        regular = False
+    if not regular:
+        for chunk in iter(lambda: infile.read(chunk_size), ""):
+            yield chunk
+        return
+    encoding = getattr(infile, "encoding", None) or \
+               locale.getpreferredencoding(False)
+    # newlines are handled just like the file object would do it: opened
+    # files translate them, but Python's stdin does not
+    decoder = io.IncrementalNewlineDecoder(
+                codecs.getincrementaldecoder(encoding)(), 
+                getattr(infile, "name", None) != "<stdin>")
+    mapped = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    try:
+        for start in range(0, len(mapped), chunk_size):
+            chunk = decoder.decode(mapped[start:start + chunk_size])
+            if chunk:
+                yield chunk
+        chunk = decoder.decode(b"", True)
+        if chunk:
+            yield chunk
+    finally:
+        mapped.close()
+
+
+def translate_stream(infile, outfile, lexer, chunk_size=CHUNK_SIZE,
+                     tokens=False, longest=False):
+    """
+    translates a whole file in chunks with constant memory. State and 
+    stack are carried from one chunk to the next, so for example a 
+    string that spans several lines is handled correctly.
+    
+    :params infile: a file object opened in text mode
+    :params outfile: a file object opened in text mode
+    :params lexer: a dict with the lexer definition or a `CompiledLexer`
+    :params chunk_size: number of characters per chunk
+    :params tokens: translate token by token (see `translate_tokens`)
+    :params longest: use the longest match in token mode
+    """
+    lexer = compile_lexer(lexer)
+    state = "root"
+    stack = []
+    if not (tokens or longest):
+        for chunk in iter_chunks(infile, chunk_size):
+            result, state = translate_chunk(chunk, lexer, state, stack)
+            outfile.write(result)
+        return
+    rest = ""
+    for chunk in iter_chunks(infile, chunk_size):
+        text = rest + chunk
+        result, state, pos = translate_tokens(text, lexer, state, stack,
+                                              longest, final=False)
+        outfile.write(result)
+        rest = text[pos:]
+    outfile.write(translate_tokens(rest, lexer, state, stack, longest)[0])
+
+
+# lexer of a worker process of `translate_parallel`
+worker_lexer = None
+
+
+def init_worker(lexer):
+    global worker_lexer
+    worker_lexer = compile_lexer(lexer)
+
+
+def translate_speculative(chunk):
+    """
+    translates a chunk once for every state of the lexer, as a worker 
+    does not know the state at the beginning of its chunk. Each run 
+    starts with an empty stack; a run that would pop beyond it or that
+    finds no rule is dropped, as it depends on what happened before.
+    
+    :returns: dict of state -> (transformed string, state at the end, 
+              states pushed onto the stack)
+    """
+    result = {}
+    for state in worker_lexer.states:
+        stack = []
+        try:
+            text, end = translate_chunk(chunk, worker_lexer, state, stack)
+        except Exception:
+            continue
+        result[state] = text, end, stack
+    return result
+
+
+def translate_parallel(infile, outfile, lexer, jobs, chunk_size=CHUNK_SIZE):
+    """
+    translates a whole file like `translate_stream`, but distributes the
+    chunks over `jobs` processes. Every chunk is translated 
+    speculatively from all states (see `translate_speculative`); then
+    the results are stitched together in order, following the real state
+    and stack from chunk to chunk. If no speculative run fits, the 
+    chunk is translated again in this process. So the output is exactly
+    the same as the serial one.
+    
+    :params jobs: number of worker processes
+    """
+    lexer = compile_lexer(lexer)
+    state = "root"
+    stack = []
+    pool = multiprocessing.Pool(jobs, init_worker, (lexer.lexer,))
+    try:
+        pending = deque()
+        chunks = iter_chunks(infile, chunk_size)
+        while True:
+            # only a few chunks are in flight to keep memory constant
+            for chunk in islice(chunks, 2 * jobs - len(pending)):
+                pending.append((chunk, pool.apply_async(
+                                        translate_speculative, (chunk,))))
+            if not pending:
+                break
+            chunk, results = pending.popleft()
+            results = results.get()
+            if state in results:
+                text, state, pushed = results[state]
+                stack.extend(pushed)
+            else:
+                text, state = translate_chunk(chunk, lexer, state, stack)
+            outfile.write(text)
+    finally:
+        pool.terminate()
+
+
 def main():
     parser = argparse.ArgumentParser("Simple state machine.")
     parser.add_argument("-l", "--lexer",
@@ -128,13 +540,55 @@ def main():
                         default=sys.stdin)
     parser.add_argument("outfile", nargs="?", type=argparse.FileType("w"),
                         default=sys.stdout)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="number of characters translated at once.")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of processes to translate with.")
+    parser.add_argument("--tokens", action="store_true",
+                        help="match rules against tokens of arbitrary "
+                             "length instead of single characters.")
+    parser.add_argument("--longest", action="store_true",
+                        help="like --tokens, but the longest match wins.")
+    parser.add_argument("--check", action="store_true",
+                        help="only check the lexer definition for errors "
+                             "(see validator.py).")
+    parser.add_argument("--codegen", action="store_true",
+                        help="translate by Python code generated from the "
+                             "lexer (see codegen.py).")
 
     args = parser.parse_args()
     
-    lexer = load(args.lexer) if args.lexer else demo_lexer
+    if args.check:
+        # imported here, as it is only needed for this mode
+        from validator import check_lexer, ERROR
+        problems = check_lexer(load(args.lexer) if args.lexer 
+                               else demo_lexer)
+        for level, message in problems:
+            sys.stderr.write(u"{}: {}\n".format(level, message))
+        sys.exit(1 if any(level == ERROR for level, _ in problems) else 0)
+    
+    lexer = compile_lexer(load(args.lexer) if args.lexer else demo_lexer)
     
-    for line in args.infile:
-        args.outfile.write("".join(translate(line, lexer)))
+    if args.jobs > 1 and (args.tokens or args.longest):
+        parser.error("--jobs can not be combined with --tokens or --longest")
+    if args.codegen and (args.tokens or args.longest or args.jobs > 1):
+        parser.error("--codegen can not be combined with --tokens, "
+                     "--longest or --jobs")
+    if args.codegen:
+        # imported here, as it is only needed for this mode
+        from codegen import load_generated
+        module = load_generated(lexer.lexer)
+        state = "root"
+        stack = []
+        for chunk in iter_chunks(args.infile, args.chunk_size):
+            result, state = module.translate_chunk(chunk, state, stack)
+            args.outfile.write(result)
+    elif args.jobs > 1:
+        translate_parallel(args.infile, args.outfile, lexer, args.jobs,
+                           args.chunk_size)
+    else:
+        translate_stream(args.infile, args.outfile, lexer, args.chunk_size,
+                         args.tokens, args.longest)
     
     #TODO: Check if this is really needed?
     args.infile.close()
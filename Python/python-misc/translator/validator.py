@@ -0,0 +1,195 @@
+#  Copyright (C) 2010  Christian Hausknecht
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+    ~~~~~~~~~~~~
+    validator.py
+    ~~~~~~~~~~~~
+
+    checks a lexer definition of `translator.py` before it is used, so it
+    does not fail in the middle of a long translation. Errors are:
+
+        - a missing "root" state or a rule that is not a triple
+        - an invalid regular expression
+        - a change into a state that does not exist
+        - a "#pop" in the "root" state, if no rule changes into "root";
+          then the stack is always empty there
+        - a state without a catch-all, i.e. there are characters no rule
+          of that state matches
+
+    Warnings are:
+
+        - a "#pop" in the "root" state, if some rule changes into
+          "root"; it fails, when "root" is the state at the beginning
+        - states that can never be reached from "root"
+        - rules that never match first, as earlier rules match all their
+          characters
+
+    The checks are done for single characters of the Basic Multilingual
+    Plane, as the translator works character by character. Rules, which
+    can match more than one character, are only used in token mode, so
+    they are not reported as never matching first.
+
+    Like `translator.py` the validator needs Python 3.
+
+    From the command line the validator is called via `translator.py`:
+
+        ./translator.py --check -l demo.json
+
+    .. moduleauthor:: Christian Hausknecht <christian.hausknecht@gmx.de>
+"""
+
+import re
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    # before Python 3.11
+    import sre_parse
+
+from translator import CompiledLexer
+
+
+ERROR = "error"
+WARNING = "warning"
+
+# characters checked for catch-alls and shadowed rules (BMP without
+# surrogates)
+ALPHABET = u"".join(chr(code) for code in range(0x10000)
+                    if not 0xd800 <= code <= 0xdfff)
+
+
+def check_structure(lexer):
+    """
+    checks the rules one by one.
+
+    :returns: list of problems, True if the lexer can not be compiled
+    """
+    problems = []
+    fatal = "root" not in lexer
+    # with a change into "root" the stack may be filled in "root"
+    root_entered = any(len(rule) == 3 and rule[2] == "root"
+                       for rules in lexer.values() for rule in rules)
+    if fatal:
+        problems.append((ERROR, u"there is no 'root' state"))
+    for state, rules in lexer.items():
+        for index, rule in enumerate(rules):
+            if len(rule) != 3:
+                problems.append((ERROR, u"rule {} of state '{}' must have "
+                                 u"three elements".format(index, state)))
+                fatal = True
+                continue
+            pattern, _, change = rule
+            try:
+                re.compile(pattern, re.DOTALL)
+            except re.error as error:
+                fatal = True
+                problems.append((ERROR, u"rule {} of state '{}' has an "
+                                 u"invalid pattern {!r}: {}".format(index,
+                                 state, pattern, error)))
+            if change and change != "#pop" and change not in lexer:
+                problems.append((ERROR, u"rule {} of state '{}' changes "
+                                 u"into the unknown state '{}'".format(
+                                 index, state, change)))
+            if change == "#pop" and state == "root":
+                if root_entered:
+                    problems.append((WARNING, u"rule {} of state 'root' "
+                                     u"pops the stack, which is empty at "
+                                     u"the beginning".format(index)))
+                else:
+                    problems.append((ERROR, u"rule {} of state 'root' "
+                                     u"pops the empty stack".format(index)))
+    return problems, fatal
+
+
+def reachable_states(lexer):
+    """
+    :returns: set of the states, which can be reached from "root"
+    """
+    seen = set(["root"])
+    todo = ["root"]
+    while todo:
+        for _, _, change in lexer[todo.pop()]:
+            if change in lexer and change not in seen:
+                seen.add(change)
+                todo.append(change)
+    return seen
+
+
+def matches_tokens(pattern):
+    """
+    checks whether a pattern can match more than one character.
+
+    :returns: True or False
+    """
+    return sre_parse.parse(pattern, re.DOTALL).getwidth()[1] > 1
+
+
+def first_matches(transitions, alphabet=ALPHABET):
+    """
+    determines for every character of the alphabet the index of the
+    first rule that matches it.
+
+    :returns: dict of rule index -> characters, list of characters
+              without any rule
+    """
+    matches = {}
+    missing = []
+    scanner = transitions.scanner
+    for char in alphabet:
+        if scanner is not None:
+            match = scanner.match(char)
+            index = int(match.lastgroup[1:]) if match else None
+        else:
+            index = next((index for index, (pattern, _, _) 
+                          in enumerate(transitions.rules) 
+                          if pattern.match(char)), None)
+        if index is None:
+            missing.append(char)
+        else:
+            matches.setdefault(index, []).append(char)
+    return matches, missing
+
+
+def check_lexer(lexer):
+    """
+    checks a lexer definition.
+
+    :params lexer: a dict with the lexer definition
+
+    :returns: list of (ERROR or WARNING, message)
+    """
+    problems, fatal = check_structure(lexer)
+    if fatal:
+        return problems
+    reachable = reachable_states(lexer)
+    for state in sorted(lexer):
+        if state not in reachable:
+            problems.append((WARNING, u"state '{}' is never reached"
+                             .format(state)))
+    compiled = CompiledLexer(lexer)
+    for state in sorted(lexer):
+        matches, missing = first_matches(compiled.states[state])
+        if missing:
+            problems.append((ERROR, u"state '{}' has no rule for {} "
+                             u"characters, e.g. {}".format(state,
+                             len(missing), u", ".join(repr(char) for char
+                                                      in missing[:5]))))
+        for index, (pattern, _, _) in enumerate(lexer[state]):
+            if index not in matches and not matches_tokens(pattern):
+                problems.append((WARNING, u"rule {} of state '{}' never "
+                                 u"matches first".format(index, state)))
+    return problems